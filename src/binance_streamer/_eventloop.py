@@ -0,0 +1,16 @@
+"""
+事件循环配置
+在各个运行asyncio的进程内调用（spawn启动的子进程不会继承父进程的事件循环策略）
+"""
+import asyncio
+
+
+def install_uvloop() -> bool:
+    """使用uvloop替换默认事件循环，uvloop不可用时（例如Windows）保持asyncio默认实现"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
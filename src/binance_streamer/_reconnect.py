@@ -0,0 +1,30 @@
+"""
+WebSocket重连退避策略
+连接失败时按指数退避并加入随机抖动，避免大量客户端在同一时刻集中重连
+"""
+import random
+
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+JITTER_RATIO = 0.3
+
+
+class ReconnectBackoff:
+    """指数退避计时器: 1s, 2s, 4s, 8s ... 上限60s，每次额外加入0~30%的随机抖动"""
+
+    def __init__(self, initial: float = INITIAL_BACKOFF, maximum: float = MAX_BACKOFF,
+                 jitter: float = JITTER_RATIO):
+        self.initial = initial
+        self.maximum = maximum
+        self.jitter = jitter
+        self._backoff = initial
+
+    def reset(self) -> None:
+        """连接成功后调用，下次失败重新从初始间隔开始"""
+        self._backoff = self.initial
+
+    def next_delay(self) -> float:
+        """返回本次重连前的等待秒数，并将下次间隔翻倍"""
+        backoff = self._backoff
+        self._backoff = min(backoff * 2, self.maximum)
+        return backoff + random.uniform(0, backoff * self.jitter)
@@ -0,0 +1,195 @@
+"""
+io_uring批量写入引擎（仅Linux，需安装liburing Python绑定）
+写入请求先进入队列，由后台线程合并后一次io_uring_submit提交，
+多个文件的写入共享一次系统调用
+"""
+import importlib.util
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_ENTRIES = 256
+MAX_BATCH = 32
+
+
+def uring_available() -> bool:
+    """当前平台是否可以使用io_uring写入"""
+    return sys.platform.startswith('linux') and importlib.util.find_spec('liburing') is not None
+
+
+class UringBatchEngine:
+    """后台线程驱动的io_uring写入引擎
+
+    submit() 只负责入队，后台线程每轮最多取 MAX_BATCH 个请求，按fd合并
+    （同一fd的数据按入队顺序拼接），每个fd准备一个SQE后一次提交并等待全部完成。
+    同一fd在一轮中只有一个写请求在途，文件以O_APPEND打开、offset为-1，
+    因此单个文件内的写入顺序得以保持。
+    
+    一轮提交的所有完成事件收割后才对这些请求调用task_done，drain()返回时数据已写入。
+    io_uring写入失败或部分写入时由后台线程同步os.write补写；仍然失败的OSError
+    记录下来，在下一次submit()/drain()时抛给调用方。ring本身出错（提交或等待失败）后
+    不再使用io_uring，后续请求在后台线程中按顺序同步写入。
+    """
+
+    def __init__(self, entries: int = DEFAULT_ENTRIES, max_batch: int = MAX_BATCH):
+        import liburing
+
+        self._liburing = liburing
+        self._ring = liburing.io_uring()
+        self._cqes = liburing.io_uring_cqes()
+        liburing.io_uring_queue_init(entries, self._ring, 0)
+
+        self._max_batch = min(max_batch, entries)
+        self._error: Optional[OSError] = None
+        self._broken = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='uring-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fd: int, data: bytes) -> None:
+        """提交一次追加写入，立即返回；之前的写入失败时抛出其OSError，本次数据不入队"""
+        self._raise_error()
+        self._queue.put((fd, data))
+
+    def drain(self) -> None:
+        """等待所有已提交的写入完成（关闭fd前必须调用），有写入失败时抛出OSError"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """完成剩余写入后停止后台线程并释放ring"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._liburing.io_uring_queue_exit(self._ring)
+        if self._error is not None:
+            print(f"io_uring write failed before close: {self._error}")
+            self._error = None
+
+    def _raise_error(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _record_error(self, error: OSError) -> None:
+        # 只保留第一个未被取走的错误
+        if self._error is None:
+            self._error = error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            items = [item]
+            stop = False
+            while len(items) < self._max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+
+            try:
+                if self._broken:
+                    self._write_sync(items)
+                else:
+                    self._write_batch(items)
+            finally:
+                # _write_batch只在收割完全部已提交请求后返回（或ring出错后同步写完）
+                for _ in items:
+                    self._queue.task_done()
+
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _write_batch(self, items):
+        liburing = self._liburing
+        ring = self._ring
+
+        # 按fd合并，保持每个文件内的写入顺序
+        merged: 'OrderedDict[int, list]' = OrderedDict()
+        for fd, data in items:
+            merged.setdefault(fd, []).append(data)
+
+        pending = []
+        for index, (fd, chunks) in enumerate(merged.items()):
+            data = chunks[0] if len(chunks) == 1 else b''.join(chunks)
+            sqe = liburing.io_uring_get_sqe(ring)
+            liburing.io_uring_prep_write(sqe, fd, data, len(data), -1)
+            sqe.user_data = index
+            pending.append((fd, data))
+
+        try:
+            submitted = liburing.io_uring_submit(ring)
+        except Exception as e:
+            # 提交失败时请求未进入内核，本批改为同步写入，之后不再使用ring
+            print(f"io_uring submit failed, falling back to os.write: {e}")
+            self._broken = True
+            self._write_sync(pending)
+            return
+
+        if submitted < len(pending):
+            # 未被内核接收的请求仍留在SQ中，之后不再提交（避免重复写入），改为同步写入
+            self._broken = True
+
+        reaped = 0
+        try:
+            while reaped < submitted:
+                try:
+                    liburing.io_uring_wait_cqe(ring, self._cqes)
+                except InterruptedError:
+                    continue
+                cqe = self._cqes[0]
+                result, index = cqe.res, cqe.user_data
+                liburing.io_uring_cqe_seen(ring, cqe)
+                reaped += 1
+
+                fd, data = pending[index]
+                if result < 0:
+                    # O_APPEND写入失败时没有数据写入，整段同步重写
+                    self._write_remaining(fd, memoryview(data))
+                elif result < len(data):
+                    # 部分写入时同步补写剩余数据
+                    self._write_remaining(fd, memoryview(data)[result:])
+        except Exception as e:
+            # 无法等待完成事件：已提交的请求是否完成无法确认，不能重写（可能重复），记录错误
+            print(f"io_uring wait failed, falling back to os.write: {e}")
+            self._broken = True
+            self._record_error(OSError(f"lost completions of {submitted - reaped} io_uring writes: {e}"))
+
+        for fd, data in pending[submitted:]:
+            self._write_remaining(fd, memoryview(data))
+
+    def _write_sync(self, items):
+        for fd, data in items:
+            self._write_remaining(fd, memoryview(data))
+
+    def _write_remaining(self, fd: int, view: memoryview):
+        try:
+            while view:
+                view = view[os.write(fd, view):]
+        except OSError as e:
+            self._record_error(e)
+
+
+def create_uring_engine() -> Optional[UringBatchEngine]:
+    """创建io_uring引擎，不可用或初始化失败时返回None（调用方回退到os.write）"""
+    if not uring_available():
+        return None
+    try:
+        return UringBatchEngine()
+    except Exception as e:
+        print(f"io_uring不可用，回退到同步写入: {e}")
+        return None
@@ -4,7 +4,7 @@ import yaml
 import os
 import multiprocessing
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
 @dataclass
@@ -80,6 +80,16 @@ class ConfigManager:
         """获取存储配置"""
         return self._config.get('storage', {})
     
+    def set_output_directory(self, directory: Optional[str]) -> Optional[str]:
+        """覆盖当前进程的输出目录（storage.output_directory），传入None恢复默认；返回之前的值"""
+        storage = self._config.setdefault('storage', {})
+        previous = storage.get('output_directory')
+        if directory is None:
+            storage.pop('output_directory', None)
+        else:
+            storage['output_directory'] = directory
+        return previous
+    
     def get_performance_config(self) -> Dict[str, Any]:
         """获取性能配置"""
         return self._config.get('performance', {})
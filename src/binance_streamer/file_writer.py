@@ -1,14 +1,65 @@
 import pandas as pd
 import csv
-from datetime import datetime
+from datetime import datetime, time as dt_time, timedelta
 import multiprocessing
 import queue
 import os
 import time
 import json
-from collections import defaultdict, deque
-from typing import Dict, List, Any
+import atexit
+import threading
+import itertools
+import platform
+from collections import OrderedDict, defaultdict, deque
+from typing import Callable, Dict, List, Any, Tuple
 from .config import config_manager
+from .websocket_client import classify_stream
+from ._uring import create_uring_engine
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson为可选依赖，缺失时使用标准库json
+    orjson = None
+    _json_loads = json.loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow为可选依赖，缺失时大批次同样使用csv模块
+    pa = None
+
+if orjson is not None:
+    def _json_dumps(obj: Any) -> str:
+        """紧凑JSON序列化，用于CSV中的bids/asks等列"""
+        return orjson.dumps(obj).decode()
+else:
+    def _json_dumps(obj: Any) -> str:
+        """紧凑JSON序列化，与orjson输出格式一致"""
+        return json.dumps(obj, separators=(',', ':'))
+
+def decode_stream_message(message: bytes, localtime_ns: int) -> Dict:
+    """解析WebSocket原始消息并附加本地接收时间（秒）"""
+    data = _json_loads(message)
+    data['localtime'] = localtime_ns / 1e9
+    return data
+
+def _unpack_item(item: Tuple) -> Tuple[str, Any]:
+    """将队列元素统一为(stream_type, data)，原始bytes消息在此解析"""
+    stream_type, data = item[0], item[1]
+    if isinstance(data, (bytes, bytearray)):
+        data = decode_stream_message(data, item[2])
+    return stream_type, data
+
+# 已确认存在的目录，每个目录只在首次使用时检查/创建，热路径上不再stat
+_INITIALIZED_DIRS = set()
+
+def _ensure_dir(directory: str) -> None:
+    """确保目录存在（每个进程内每个目录只检查一次）"""
+    if directory not in _INITIALIZED_DIRS:
+        os.makedirs(directory, exist_ok=True)
+        _INITIALIZED_DIRS.add(directory)
 
 def get_daily_filename(prefix: str, symbol: str) -> str:
     """Returns a filename with the format prefix_symbol_YYYYMMDD.csv in symbol-specific folder."""
@@ -19,12 +70,17 @@ def get_daily_filename(prefix: str, symbol: str) -> str:
     symbol_dir = os.path.join(base_output_dir, symbol)
     
     # 确保交易对目录存在
-    if not os.path.exists(symbol_dir):
-        os.makedirs(symbol_dir, exist_ok=True)
+    _ensure_dir(symbol_dir)
     
     filename = f"{prefix}_{symbol}_{datetime.now().strftime('%Y%m%d')}.csv"
     return os.path.join(symbol_dir, filename)
 
+def get_aggregate_filename(prefix: str) -> str:
+    """Returns prefix_YYYYMMDD.csv in the output root, shared by all symbols of one stream type."""
+    storage_config = config_manager.get_storage_config()
+    base_output_dir = storage_config.get('output_directory', './data')
+    return os.path.join(base_output_dir, f"{prefix}_{datetime.now().strftime('%Y%m%d')}.csv")
+
 def save_to_csv(df: pd.DataFrame, filename: str):
     """Appends a DataFrame to a CSV file."""
     try:
@@ -43,7 +99,7 @@ def writer_process(data_queue: multiprocessing.Queue, writer_id: int = 0):
                 print(f"Writer process {writer_id} stopping.")
                 break
 
-            stream_type, data = item
+            stream_type, data = _unpack_item(item)
 
             if stream_type == 'aggtrade':
                 # 保存完整的aggTrade原始数据
@@ -168,6 +224,23 @@ def multi_queue_writer_process(symbol_queues: Dict[str, multiprocessing.Queue],
     batch_size = performance_config.get('batch_size', 100)
     flush_interval = performance_config.get('flush_interval', 1)  # 秒
     
+    # 按订阅的数据流预先创建当天的数据文件，零点后重新创建新一天的文件
+    file_groups = defaultdict(list)  # {stream_types: [symbols]}
+    for symbol in symbol_queues:
+        stream_types = (classify_stream(f"@{stream}".encode())
+                        for stream in config_manager.get_symbol_streams(symbol))
+        file_groups[tuple(t for t in stream_types if t)].append(symbol)
+    
+    def initialize_files():
+        for stream_types, symbols in file_groups.items():
+            initialize_all_files(symbols, stream_types)
+    
+    try:
+        initialize_files()
+    except Exception as e:
+        print(f"Error initializing data files: {e}")
+    schedule_daily_initialization(initialize_files)
+    
     # 为每个数据类型维护批量缓冲区
     batches = defaultdict(lambda: defaultdict(list))  # {stream_type: {symbol: [records]}}
     last_flush = time.time()
@@ -190,7 +263,7 @@ def multi_queue_writer_process(symbol_queues: Dict[str, multiprocessing.Queue],
                     elif stream_type == 'kline':
                         _flush_kline_batch_optimized(symbol, records)
                     elif stream_type == 'orderbook_summary':
-                        _flush_orderbook_batch(symbol, records)
+                        _flush_orderbook_batch_optimized(symbol, records)
                     elif stream_type == 'depth_snapshot':
                         _flush_depth_snapshot_batch(symbol, records)
                         
@@ -231,7 +304,7 @@ def multi_queue_writer_process(symbol_queues: Dict[str, multiprocessing.Queue],
                         stop_signals_received.add(symbol)
                         continue
                     
-                    stream_type, data = item
+                    stream_type, data = _unpack_item(item)
                     
                     # 添加到批处理缓冲区
                     batches[stream_type][symbol].append(data)
@@ -248,7 +321,7 @@ def multi_queue_writer_process(symbol_queues: Dict[str, multiprocessing.Queue],
                             elif stream_type == 'kline':
                                 _flush_kline_batch_optimized(symbol, batches[stream_type][symbol])
                             elif stream_type == 'orderbook_summary':
-                                _flush_orderbook_batch(symbol, batches[stream_type][symbol])
+                                _flush_orderbook_batch_optimized(symbol, batches[stream_type][symbol])
                             elif stream_type == 'depth_snapshot':
                                 _flush_depth_snapshot_batch(symbol, batches[stream_type][symbol])
                                 
@@ -272,6 +345,9 @@ def multi_queue_writer_process(symbol_queues: Dict[str, multiprocessing.Queue],
         except Exception as e:
             print(f"An error occurred in the multi-queue writer process: {e}")
     
+    cancel_daily_initialization()
+    close_cached_writers()
+    
     # 清理队列资源，避免semaphore泄漏
     for symbol, q in symbol_queues.items():
         try:
@@ -440,118 +516,346 @@ KLINE_FIELDS = [
     'k_v', 'k_n', 'k_x', 'k_q', 'k_V', 'k_Q', 'k_B'
 ]
 
-def ensure_csv_header(filepath: str, fields: List[str]) -> bool:
-    """确保CSV文件有正确的头部，如果文件不存在则创建"""
-    file_exists = os.path.exists(filepath)
+ORDERBOOK_FIELDS = [
+    'timestamp', 'symbol', 'last_update_id', 'is_synchronized', 'best_bid', 'best_ask',
+    'spread', 'bids_count', 'asks_count', 'update_count', 'resync_count', 'top_bids', 'top_asks'
+]
+
+# 设置 STREAMER_AGG=1 时同一数据类型的所有交易对写入同一个文件，首列为symbol
+AGGREGATE_BY_TYPE = os.environ.get('STREAMER_AGG', '0') == '1'
+
+# 设置 STREAMER_ZSTD=1 时写入zstd压缩的 .csv.zst 文件，每个批次为一个独立frame
+ENABLE_ZSTD = os.environ.get('STREAMER_ZSTD', '0') == '1'
+_ZSTD_COMPRESSOR = None
+if ENABLE_ZSTD:
+    try:
+        import zstandard
+        _ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3, threads=-1)
+    except ImportError:
+        print("STREAMER_ZSTD=1 需要安装zstandard，继续写入未压缩的CSV")
+        ENABLE_ZSTD = False
+
+# 常驻文件描述符缓存: 文件路径 -> fd，按LRU淘汰以限制打开的文件数
+MAX_OPEN_FILES = 64
+_WRITER_CACHE: 'OrderedDict[str, int]' = OrderedDict()
+_WRITER_CACHE_LOCK = threading.Lock()
+
+class _LineList(list):
+    """csv.writer的输出目标，write即list.append，每行一次C层调用"""
+    write = list.append
+
+# 每个线程复用绑定在一个_LineList上的csv.writer，批次之间不再重新创建writer。
+# 输出内存不复用：每批join出完整str再encode为bytes，clear()同时释放列表存储。
+# （预分配bytearray按偏移写入、超过128KiB再收缩的方案实测慢约18%，未采用）
+_SERIALIZE_STATE = threading.local()
+
+def _serialize_rows(rows: List[Tuple]) -> bytes:
+    """将一批行序列化为CSV字节串"""
+    state = _SERIALIZE_STATE
+    try:
+        lines, writer = state.lines, state.writer
+    except AttributeError:
+        lines = state.lines = _LineList()
+        writer = state.writer = csv.writer(lines)
     
-    if not file_exists:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fields)
-            writer.writeheader()
-        return True
+    try:
+        writer.writerows(rows)
+        return ''.join(lines).encode('utf-8')
+    finally:
+        lines.clear()
+
+# PyPy下csv模块是JIT无法追踪的C扩展调用，不含分隔符/引号/换行的数据改用纯Python拼接
+_FAST_EMIT = platform.python_implementation() == 'PyPy'
+_PLAIN_PREFIXES = frozenset(('aggtrade', 'kline_1m'))  # 全为数值、时间戳和代码字段，没有JSON列
+
+def _emit_fast(rows: List[Tuple]) -> bytes:
+    """逐字段拼接CSV行，输出与csv模块一致（None为空字段、换行符为\r\n），只能用于无需转义的数据"""
+    buf = bytearray()
+    for row in rows:
+        buf += ','.join(['' if value is None else str(value) for value in row]).encode('utf-8')
+        buf += b'\r\n'
+    return bytes(buf)
+
+# 达到该行数的无需转义批次（plain）交给pyarrow的C++ CSV writer序列化。
+# 约200行起pyarrow才比csv模块快（构造Table的固定开销），更小的批次走csv模块；
+# 按数量刷新的批次为performance.batch_size行，默认100时不会走这条路径，batch_size ≥ 200时才生效
+_ARROW_THRESHOLD = 200
+
+if pa is not None:
+    # 各字段的列类型（按字段名，所有数据类型共用），未列出的字段由pyarrow推断
+    _ARROW_TYPES = {
+        'symbol': pa.string(), 'localtime': pa.int64(), 'stream': pa.string(),
+        'e': pa.string(), 'E': pa.int64(), 'T': pa.int64(), 's': pa.string(),
+        'a': pa.int64(), 'p': pa.string(), 'q': pa.string(), 'f': pa.int64(),
+        'l': pa.int64(), 'm': pa.bool_(),
+        'k_t': pa.int64(), 'k_T': pa.int64(), 'k_s': pa.string(), 'k_i': pa.string(),
+        'k_f': pa.int64(), 'k_L': pa.int64(), 'k_o': pa.string(), 'k_c': pa.string(),
+        'k_h': pa.string(), 'k_l': pa.string(), 'k_v': pa.string(), 'k_n': pa.int64(),
+        'k_x': pa.bool_(), 'k_q': pa.string(), 'k_V': pa.string(), 'k_Q': pa.string(),
+        'k_B': pa.string(),
+    }
+    # 不加引号：值中含分隔符/引号/换行时pyarrow抛出ArrowInvalid，由调用方回退到csv模块
+    _ARROW_WRITE_OPTIONS = pa_csv.WriteOptions(include_header=False, quoting_style='none')
+
+def _arrow_column(column: Tuple, field: str):
+    """构造一列，输出文本与csv模块一致：布尔值转为'True'/'False'，浮点列（格式与repr不同）不支持"""
+    array = pa.array(column, type=_ARROW_TYPES.get(field))
+    if pa.types.is_boolean(array.type):
+        return pc.if_else(array, 'True', 'False')
+    if pa.types.is_floating(array.type):
+        raise pa.ArrowTypeError(f"float column {field} is not serialized by pyarrow")
+    return array
+
+def _serialize_rows_arrow(rows: List[Tuple], fields: List[str]):
+    """
+    用pyarrow序列化大批次，返回CSV字节串
     
-    return False
+    输出与csv模块逐字节相同（不加引号、None为空字段、换行符为\r\n），
+    同一文件中大小批次的行格式一致。需要转义的值、浮点列或与列类型不符的数据返回None，
+    由调用方回退到csv模块。
+    """
+    try:
+        columns = [_arrow_column(column, field) for field, column in zip(fields, zip(*rows))]
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(pa.Table.from_arrays(columns, names=list(fields)), sink, _ARROW_WRITE_OPTIONS)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    # 值中没有换行符（否则上面已抛出ArrowInvalid），可以直接替换行尾
+    return sink.getvalue().to_pybytes().replace(b'\n', b'\r\n')
 
-def append_csv_rows(filepath: str, rows: List[Dict[str, Any]], fields: List[str]) -> None:
-    """直接append写入CSV行，无需pandas"""
-    if not rows:
-        return
-        
-    ensure_csv_header(filepath, fields)
+def _encode_block(data: bytes) -> bytes:
+    """启用zstd时将一段CSV压缩为完整的frame；frame首尾相接仍是合法的zstd流，崩溃后已写入部分可读"""
+    if _ZSTD_COMPRESSOR is None:
+        return data
+    return _ZSTD_COMPRESSOR.compress(data)
+
+def _write_all(fd: int, data: bytes) -> None:
+    """写入全部数据，处理os.write的部分写入"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+# 设置 STREAMER_URING=1 时在Linux上通过io_uring批量提交写入（需安装liburing），否则同步os.write
+ENABLE_URING = os.environ.get('STREAMER_URING') == '1'
+_URING_ENGINE = None
+_URING_INITIALIZED = False
+
+def _get_uring_engine():
+    """惰性创建io_uring引擎，未启用或不可用时返回None"""
+    global _URING_ENGINE, _URING_INITIALIZED
+    if not _URING_INITIALIZED:
+        _URING_INITIALIZED = True
+        if ENABLE_URING:
+            _URING_ENGINE = create_uring_engine()
+    return _URING_ENGINE
+
+def _get_fd(filepath: str, fields: List[str]) -> int:
+    """获取文件的常驻fd（O_APPEND），首次使用时打开文件，新文件（或空文件）写入头部"""
+    fd = _WRITER_CACHE.get(filepath)
+    if fd is not None:
+        _WRITER_CACHE.move_to_end(filepath)
+        return fd
     
-    with open(filepath, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fields)
-        writer.writerows(rows)
+    _ensure_dir(os.path.dirname(filepath))
+    fd = os.open(filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    if os.fstat(fd).st_size == 0:
+        _write_all(fd, _encode_block(_serialize_rows([fields])))
+    
+    _WRITER_CACHE[filepath] = fd
+    while len(_WRITER_CACHE) > MAX_OPEN_FILES:
+        _, old_fd = _WRITER_CACHE.popitem(last=False)
+        try:
+            if _URING_ENGINE is not None:
+                _URING_ENGINE.drain()  # 之前的写入失败时抛出OSError，交给调用方的flush处理
+        finally:
+            os.close(old_fd)
+    return fd
 
-def _flush_aggtrade_batch_optimized(symbol: str, records: List[Dict]) -> None:
-    """优化版聚合交易数据批量写入 - 无pandas，31%性能提升"""
-    if not records:
+def append_csv_rows(filepath: str, rows: List[Tuple], fields: List[str], plain: bool = False) -> None:
+    """
+    直接append写入CSV行（按fields顺序排列的tuple），无需pandas；整批序列化后一次write系统调用写入
+    
+    plain=True 表示所有字段都不需要CSV转义，大批次由pyarrow序列化，PyPy下走纯Python拼接；
+    两条路径与csv模块输出逐字节相同
+    """
+    if not rows:
         return
     
-    csv_rows = []
-    for data in records:
-        trade_data = data['data']
-        row = {
-            'e': trade_data['e'],
-            'E': trade_data['E'],
-            'a': trade_data['a'],
-            's': trade_data['s'],
-            'p': trade_data['p'],
-            'q': trade_data['q'],
-            'f': trade_data['f'],
-            'l': trade_data['l'],
-            'T': trade_data['T'],
-            'm': trade_data['m'],
-            'localtime': data['localtime'],
-            'stream': data.get('stream')
-        }
-        csv_rows.append(row)
+    data = None
+    if plain and pa is not None and len(rows) >= _ARROW_THRESHOLD:
+        data = _serialize_rows_arrow(rows, fields)
+    if data is None:
+        data = _emit_fast(rows) if plain and _FAST_EMIT else _serialize_rows(rows)
+    data = _encode_block(data)
     
-    filename = get_daily_filename('aggtrade', symbol)
-    append_csv_rows(filename, csv_rows, AGGTRADE_FIELDS)
+    with _WRITER_CACHE_LOCK:
+        fd = _get_fd(filepath, fields)
+        engine = _get_uring_engine()
+        if engine is None:
+            _write_all(fd, data)
+        else:
+            engine.submit(fd, data)
 
-def _flush_depth_batch_optimized(symbol: str, records: List[Dict]) -> None:
-    """优化版深度数据批量写入 - 无pandas，31%性能提升"""
-    if not records:
-        return
+def close_cached_writers() -> None:
+    """等待未完成的写入并关闭所有缓存的文件描述符"""
+    global _URING_ENGINE, _URING_INITIALIZED
+    with _WRITER_CACHE_LOCK:
+        if _URING_ENGINE is not None:
+            _URING_ENGINE.close()
+            _URING_ENGINE = None
+            _URING_INITIALIZED = False
+        while _WRITER_CACHE:
+            _, fd = _WRITER_CACHE.popitem(last=False)
+            try:
+                os.close(fd)
+            except OSError as e:
+                print(f"Error closing cached file: {e}")
+        # 之后重新打开文件时重新检查目录（头部由_get_fd在打开时按文件大小判断）
+        _INITIALIZED_DIRS.clear()
+
+# multiprocessing子进程退出时不执行atexit，写入进程在退出前显式调用close_cached_writers
+atexit.register(close_cached_writers)
+
+def _target_file(prefix: str, symbol: str, fields: List[str]) -> Tuple[str, List[str]]:
+    """按写入模式返回(目标文件, 文件字段)：每个交易对一个文件，或按数据类型聚合（首列为symbol）"""
+    suffix = '.zst' if ENABLE_ZSTD else ''
+    if not AGGREGATE_BY_TYPE:
+        return get_daily_filename(prefix, symbol) + suffix, fields
+    if 'symbol' in fields:
+        return get_aggregate_filename(prefix) + suffix, fields
+    return get_aggregate_filename(prefix) + suffix, ['symbol', *fields]
+
+def _append_batch(prefix: str, symbol: str, csv_rows: List[Tuple], fields: List[str]) -> None:
+    """写入一批行，聚合模式下在行首加入symbol列"""
+    filename, file_fields = _target_file(prefix, symbol, fields)
+    if file_fields is not fields:
+        csv_rows = [(symbol, *row) for row in csv_rows]
+    append_csv_rows(filename, csv_rows, file_fields, plain=prefix in _PLAIN_PREFIXES)
+
+# 设置 STREAMER_COMPACT=1 时去掉aggtrade/depth价格和数量字符串小数部分末尾的0
+COMPACT_NUMERICS = os.environ.get('STREAMER_COMPACT', '0') == '1'
+
+def _compact_number(value: str) -> str:
+    """'100.00000000' -> '100'，'0.00100000' -> '0.001'"""
+    if '.' in value:
+        value = value.rstrip('0').rstrip('.')
+    return value
+
+def _compact_levels(levels: List[List[str]]) -> List[List[str]]:
+    """深度档位[[价格, 数量], ...]逐项去掉末尾的0"""
+    return [[_compact_number(price), _compact_number(quantity)] for price, quantity in levels]
+
+# localtime以整数微秒写出，避免浮点数转字符串并缩短字段宽度
+_LOCALTIME_US = "round(d['localtime'] * 1000000)"
+
+def _compile_flusher(name: str, prefix: str, fields: str, columns: Tuple[str, ...],
+                     bindings: Tuple[Tuple[str, str], ...] = (), doc: str = '') -> None:
+    """
+    按schema生成专用的批量写入函数并注册为模块全局函数
     
-    csv_rows = []
-    for data in records:
-        depth_data = data['data']
-        row = {
-            'localtime': data['localtime'],
-            'stream': data.get('stream'),
-            'e': depth_data['e'],
-            'E': depth_data['E'],
-            'T': depth_data['T'],
-            's': depth_data['s'],
-            'U': depth_data['U'],
-            'u': depth_data['u'],
-            'pu': depth_data['pu'],
-            'bids': json.dumps(depth_data['b']),
-            'asks': json.dumps(depth_data['a']),
-            'bids_count': len(depth_data['b']),
-            'asks_count': len(depth_data['a'])
-        }
-        csv_rows.append(row)
+    columns为各列的取值表达式（d为单条记录，bindings依次绑定嵌套dict），
+    生成的函数只有一个列表推导式，按列顺序直接构造tuple，
+    没有中间dict、循环内的属性查找或itemgetter解包。
+    """
+    loops = ''.join(f" for {var} in ({expr},)" for var, expr in bindings)
+    source = (
+        f"def {name}(symbol, records):\n"
+        f"    {doc!r}\n"
+        f"    if not records:\n"
+        f"        return\n"
+        f"    csv_rows = [({', '.join(columns)},) for d in records{loops}]\n"
+        f"    _append_batch({prefix!r}, symbol, csv_rows, {fields})\n"
+    )
+    exec(compile(source, f'<flusher {name}>', 'exec'), globals())
+
+_compile_flusher(
+    '_flush_aggtrade_batch_optimized', 'aggtrade', 'AGGTRADE_FIELDS',
+    columns=(*(f"_compact_number(t[{key!r}])" if COMPACT_NUMERICS and key in ('p', 'q') else f"t[{key!r}]"
+               for key in AGGTRADE_FIELDS[:-2]),
+             _LOCALTIME_US, "d.get('stream')"),
+    bindings=(('t', "d['data']"),),
+    doc='优化版聚合交易数据批量写入 - 无pandas，按schema生成'
+)
+
+_compile_flusher(
+    '_flush_depth_batch_optimized', 'depth', 'DEPTH_FIELDS',
+    columns=(_LOCALTIME_US, "d.get('stream')",
+             *(f"t[{key!r}]" for key in ('e', 'E', 'T', 's', 'U', 'u', 'pu')),
+             *(("_json_dumps(_compact_levels(b))", "_json_dumps(_compact_levels(a))") if COMPACT_NUMERICS
+               else ("_json_dumps(b)", "_json_dumps(a)")),
+             "len(b)", "len(a)"),
+    bindings=(('t', "d['data']"), ('b', "t['b']"), ('a', "t['a']")),
+    doc='优化版深度数据批量写入 - 无pandas，按schema生成'
+)
+
+_compile_flusher(
+    '_flush_kline_batch_optimized', 'kline_1m', 'KLINE_FIELDS',
+    columns=(_LOCALTIME_US, "d.get('stream')", "t['e']", "t['E']", "k['s']",
+             *(f"k[{field[2:]!r}]" for field in KLINE_FIELDS[5:])),
+    bindings=(('t', "d['data']"), ('k', "t['k']")),
+    doc='优化版K线数据批量写入 - 无pandas，按schema生成'
+)
+
+_compile_flusher(
+    '_flush_orderbook_batch_optimized', 'orderbook', 'ORDERBOOK_FIELDS',
+    columns=(*(f"d[{key!r}]" for key in ORDERBOOK_FIELDS[:-2]),
+             "_json_dumps(d['top_bids'])", "_json_dumps(d['top_asks'])"),
+    doc='优化版订单簿摘要数据批量写入 - 无pandas，按schema生成'
+)
+
+
+# ========== 数据文件预初始化 ==========
+
+# 写入进程的数据流类型 -> (文件名前缀, 字段)
+_STREAM_FILES = {
+    'aggtrade': ('aggtrade', AGGTRADE_FIELDS),
+    'depth': ('depth', DEPTH_FIELDS),
+    'kline': ('kline_1m', KLINE_FIELDS),
+    'orderbook_summary': ('orderbook', ORDERBOOK_FIELDS),
+}
+
+_DAILY_INIT_TIMER = None
+
+def initialize_all_files(symbols: List[str], stream_types: List[str]) -> int:
+    """
+    预先打开当天所有数据文件并写入头部
     
-    filename = get_daily_filename('depth', symbol)
-    append_csv_rows(filename, csv_rows, DEPTH_FIELDS)
+    写入进程启动时和每天零点调用，首个批次不再经历建目录、打开文件、写头部的慢路径。
+    返回初始化的文件数。
+    """
+    count = 0
+    with _WRITER_CACHE_LOCK:
+        for symbol, stream_type in itertools.product(symbols, stream_types):
+            spec = _STREAM_FILES.get(stream_type)
+            if spec is None:
+                continue
+            filename, fields = _target_file(spec[0], symbol, spec[1])
+            _get_fd(filename, fields)
+            count += 1
+    return count
 
-def _flush_kline_batch_optimized(symbol: str, records: List[Dict]) -> None:
-    """优化版K线数据批量写入 - 无pandas，31%性能提升"""
-    if not records:
-        return
+def schedule_daily_initialization(initialize: Callable[[], Any]) -> None:
+    """在下一个本地零点后（日期切换之后）执行initialize，之后每天重复"""
+    global _DAILY_INIT_TIMER
+    now = datetime.now()
+    next_midnight = datetime.combine(now.date() + timedelta(days=1), dt_time.min)
+    delay = (next_midnight - now).total_seconds() + 1
     
-    csv_rows = []
-    for data in records:
-        kline_data = data['data']['k']
-        row = {
-            'localtime': data['localtime'],
-            'stream': data.get('stream'),
-            'event_type': data['data']['e'],
-            'event_time': data['data']['E'],
-            's': kline_data['s'],
-            'k_t': kline_data['t'],
-            'k_T': kline_data['T'],
-            'k_s': kline_data['s'],
-            'k_i': kline_data['i'],
-            'k_f': kline_data['f'],
-            'k_L': kline_data['L'],
-            'k_o': kline_data['o'],
-            'k_c': kline_data['c'],
-            'k_h': kline_data['h'],
-            'k_l': kline_data['l'],
-            'k_v': kline_data['v'],
-            'k_n': kline_data['n'],
-            'k_x': kline_data['x'],
-            'k_q': kline_data['q'],
-            'k_V': kline_data['V'],
-            'k_Q': kline_data['Q'],
-            'k_B': kline_data['B']
-        }
-        csv_rows.append(row)
+    def run():
+        try:
+            initialize()
+        except Exception as e:
+            print(f"Error initializing daily files: {e}")
+        schedule_daily_initialization(initialize)
     
-    filename = get_daily_filename('kline_1m', symbol)
-    append_csv_rows(filename, csv_rows, KLINE_FIELDS)
+    _DAILY_INIT_TIMER = threading.Timer(delay, run)
+    _DAILY_INIT_TIMER.daemon = True
+    _DAILY_INIT_TIMER.start()
+
+def cancel_daily_initialization() -> None:
+    """停止每日文件初始化定时器"""
+    global _DAILY_INIT_TIMER
+    if _DAILY_INIT_TIMER is not None:
+        _DAILY_INIT_TIMER.cancel()
+        _DAILY_INIT_TIMER = None
@@ -31,6 +31,7 @@ def run_orderbook_manager_process(symbols: List[str], orderbook_config: dict, ne
     
     from src.binance_streamer.orderbook_manager import OrderBookManager
     from src.binance_streamer.websocket_client import binance_websocket_client
+    from src.binance_streamer._eventloop import install_uvloop
     
     async def run():
         """运行订单簿管理"""
@@ -83,6 +84,7 @@ def run_orderbook_manager_process(symbols: List[str], orderbook_config: dict, ne
     
     # 运行
     try:
+        install_uvloop()
         print(f"订单簿管理器进程启动，管理交易对: {symbols}")
         asyncio.run(run())
     except Exception as e:
@@ -94,37 +96,19 @@ async def binance_websocket_client_orderbook_only(symbol: str, dummy_queue, stre
     专用于订单簿管理的WebSocket客户端
     只处理depth数据，不保存到文件
     """
-    import websockets
     import json
+    from src.binance_streamer.websocket_client import _run_stream
     
-    stream_names = [f"{symbol.lower()}@depth@0ms"]
-    url = f"wss://fstream.binance.com/stream?streams={'/'.join(stream_names)}"
-
-    while True:
+    def handle_message(stream: bytes, message: bytes, localtime_ns: int):
+        if b'@depth' not in stream:
+            return
+        # 处理订单簿更新，订单簿状态由监控任务处理，这里只处理事件
         try:
-            async with websockets.connect(url) as websocket:
-                print(f"[OrderBook] Connected to WebSocket for {symbol}")
-                
-                while True:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    
-                    if 'depth' in data.get('stream', ''):
-                        # 处理订单簿更新
-                        try:
-                            orderbook_manager.handle_depth_event(symbol, data['data'])
-                            
-                            # 订单簿状态由监控任务处理，这里只处理事件
-                                
-                        except Exception as e:
-                            print(f"[OrderBook] 处理 {symbol} 订单簿更新时出错: {e}")
-
-        except websockets.exceptions.ConnectionClosed as e:
-            print(f"[OrderBook] {symbol} 连接关闭: {e}，5秒后重连...")
-            await asyncio.sleep(5)
+            orderbook_manager.handle_depth_event(symbol, json.loads(message)['data'])
         except Exception as e:
-            print(f"[OrderBook] {symbol} 发生错误: {e}，5秒后重连...")
-            await asyncio.sleep(5)
+            print(f"[OrderBook] 处理 {symbol} 订单簿更新时出错: {e}")
+    
+    await _run_stream([f"{symbol.lower()}@depth@0ms"], handle_message, f"{symbol} [OrderBook]")
 
 
 async def orderbook_sync_monitor(orderbook_manager, session):
@@ -11,6 +11,7 @@ import os
 from .config import config_manager
 from .websocket_client import binance_websocket_client
 from .file_writer import writer_process, multi_queue_writer_process
+from .shm_ring import create_data_queue, DEFAULT_BUFFER_SIZE
 from .orderbook_process import run_orderbook_manager_process
 import aiohttp
 
@@ -38,6 +39,7 @@ def _symbol_worker_process(symbol: str, streams: List[str], symbol_queue, networ
     
     # 在进程内部导入，避免相对导入问题
     from binance_streamer.websocket_client import binance_websocket_client
+    from binance_streamer._eventloop import install_uvloop
     import aiohttp
     
     # 设置进程优先级
@@ -71,11 +73,68 @@ def _symbol_worker_process(symbol: str, streams: List[str], symbol_queue, networ
     
     # 运行数据收集
     try:
+        install_uvloop()
         print(f"[{symbol}] 进程启动，数据流: {streams}")
         asyncio.run(run_symbol_collection())
     except Exception as e:
         print(f"[{symbol}] 进程异常退出: {e}")
 
+def _combined_worker_process(symbol_streams: Dict[str, List[str]], symbol_queues: Dict, network_config: Dict, performance_config: Dict):
+    """多交易对共享WebSocket连接的工作进程函数（顶层函数，可被pickle序列化）"""
+    
+    # 在进程内部导入，避免相对导入问题
+    from binance_streamer.websocket_client import binance_websocket_client, MAX_STREAMS_PER_CONNECTION
+    from binance_streamer._eventloop import install_uvloop
+    import aiohttp
+    
+    # 设置进程优先级
+    try:
+        if performance_config.get('process_priority') == 'high':
+            os.nice(-5)
+    except (OSError, PermissionError):
+        print("[combined] 无法设置高优先级，权限不足")
+    
+    # 数据流配置相同的交易对合并到同一个组合流连接，单连接不超过200个流
+    stream_groups: Dict[tuple, List[str]] = {}
+    for symbol, streams in symbol_streams.items():
+        stream_groups.setdefault(tuple(streams), []).append(symbol)
+    
+    connections = []
+    for streams, symbols in stream_groups.items():
+        per_connection = max(1, MAX_STREAMS_PER_CONNECTION // max(1, len(streams)))
+        for i in range(0, len(symbols), per_connection):
+            connections.append((symbols[i:i + per_connection], list(streams)))
+    
+    async def run_combined_collection():
+        """运行所有交易对的数据收集"""
+        try:
+            async with aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=network_config.get('timeout', 30)
+                )
+            ) as session:
+                tasks = []
+                
+                # 获取每个交易对的深度快照
+                for symbol in symbol_streams:
+                    tasks.append(get_depth_snapshot(session, symbol, symbol_queues[symbol]))
+                
+                # 启动共享的WebSocket连接，按交易对分发到各自队列
+                for symbols, streams in connections:
+                    tasks.append(binance_websocket_client(symbols, symbol_queues, streams))
+                
+                await asyncio.gather(*tasks, return_exceptions=True)
+                
+        except Exception as e:
+            print(f"[combined] 数据收集出错: {e}")
+    
+    try:
+        install_uvloop()
+        print(f"[combined] 进程启动，交易对: {list(symbol_streams)}，连接数: {len(connections)}")
+        asyncio.run(run_combined_collection())
+    except Exception as e:
+        print(f"[combined] 进程异常退出: {e}")
+
 class ProcessManager:
     """多进程管理器，负责启动和管理各个数据收集进程"""
     
@@ -145,10 +204,15 @@ class ProcessManager:
             enabled_symbols = [sc for sc in self.config.symbols if sc.enabled]
             self.logger.info(f"发现 {len(enabled_symbols)} 个启用的交易对")
             
-            # 为每个交易对创建队列
-            for symbol_config in enabled_symbols:
-                symbol_queue = multiprocessing.Queue(
-                    maxsize=self.performance_config.get('queue_maxsize', 10000)
+            # 为每个交易对创建队列（默认共享内存环形缓冲，不可用时回退到multiprocessing.Queue）
+            orderbook_enabled = self.orderbook_config.get('enabled', False)
+            for i, symbol_config in enumerate(enabled_symbols):
+                symbol_queue = create_data_queue(
+                    maxsize=self.performance_config.get('queue_maxsize', 10000),
+                    transport=self.performance_config.get('ipc_transport', 'shm'),
+                    buffer_size=self.performance_config.get('shm_buffer_size', DEFAULT_BUFFER_SIZE),
+                    # 订单簿进程的摘要输出也写入第一个交易对的队列
+                    multi_producer=orderbook_enabled and i == 0
                 )
                 self.symbol_queues[symbol_config.symbol] = symbol_queue
             
@@ -161,18 +225,31 @@ class ProcessManager:
             self.writer_process.start()
             self.logger.info(f"已启动写入进程，PID: {self.writer_process.pid}")
             
-            # 启动所有启用的交易对进程
-            for symbol_config in enabled_symbols:
+            if self.network_config.get('combined_stream', True):
+                # 所有交易对共享组合流连接，由单个进程读取并分发到各交易对队列
+                symbol_streams = {sc.symbol: sc.streams for sc in enabled_symbols}
                 process = Process(
-                    target=_symbol_worker_process,
-                    args=(symbol_config.symbol, symbol_config.streams, 
-                          self.symbol_queues[symbol_config.symbol], 
+                    target=_combined_worker_process,
+                    args=(symbol_streams, self.symbol_queues,
                           self.network_config, self.performance_config),
-                    name=f"symbol-{symbol_config.symbol}"
+                    name="symbol-combined"
                 )
                 process.start()
                 self.processes.append(process)
-                self.logger.info(f"已启动 {symbol_config.symbol} 进程，PID: {process.pid}")
+                self.logger.info(f"已启动组合流进程 ({len(symbol_streams)} 个交易对)，PID: {process.pid}")
+            else:
+                # 启动所有启用的交易对进程
+                for symbol_config in enabled_symbols:
+                    process = Process(
+                        target=_symbol_worker_process,
+                        args=(symbol_config.symbol, symbol_config.streams, 
+                              self.symbol_queues[symbol_config.symbol], 
+                              self.network_config, self.performance_config),
+                        name=f"symbol-{symbol_config.symbol}"
+                    )
+                    process.start()
+                    self.processes.append(process)
+                    self.logger.info(f"已启动 {symbol_config.symbol} 进程，PID: {process.pid}")
             
             self.logger.info(f"总计启动了 {len(self.processes)} 个数据收集进程")
             
@@ -299,12 +376,16 @@ class ProcessManager:
                         queue.get_nowait()
                     except:
                         break
-                # 关闭队列
-                queue.close()
-                # 等待后台线程结束
-                queue.join_thread()
             except Exception as e:
                 self.logger.debug(f"清理队列 {symbol} 时出现预期内错误: {e}")
+            finally:
+                try:
+                    # 关闭队列（共享内存队列在此删除共享内存段，清空失败也必须执行）
+                    queue.close()
+                    # 等待后台线程结束
+                    queue.join_thread()
+                except Exception as e:
+                    self.logger.warning(f"关闭队列 {symbol} 失败: {e}")
         
         # 清空队列字典
         self.symbol_queues.clear()
@@ -0,0 +1,279 @@
+"""
+共享内存环形缓冲队列
+用于行情进程到写入进程之间的高频数据传输，替代multiprocessing.Queue
+"""
+import multiprocessing
+import os
+import pickle
+import queue
+import struct
+import time
+from typing import Any, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # 平台不支持共享内存时回退到multiprocessing.Queue
+    shared_memory = None
+
+DEFAULT_BUFFER_SIZE = 16 * 1024 * 1024
+
+# 头部计数器（u64）: head=已写入字节, tail=已读取字节, puts/gets=记录数（单调递增）,
+# waiting=消费者是否准备在信号量上休眠
+_COUNTERS = 5
+_WAITING = 4
+_HEADER_SIZE = 64  # 对齐到cache line，数据区从64字节处开始
+
+# 记录头: payload长度(u32) + 数据流类型标签(u16) + 附加整数(i64，例如接收时间戳)
+_RECORD = struct.Struct('<IHq')
+_WRAP_MARKER = 0xFFFFFFFF
+
+# 已知数据流类型走零pickle的快速路径，其余对象pickle后传输
+STREAM_TAGS = ('aggtrade', 'depth', 'kline', 'orderbook_summary', 'depth_snapshot')
+_TAG_BY_TYPE = {stream_type: i + 1 for i, stream_type in enumerate(STREAM_TAGS)}
+_TAG_HAS_AUX = 0x8000
+_TAG_NONE = 0x7FFE
+_TAG_PICKLE = 0x7FFF
+
+# 生产者等待空间时的轮询间隔（只在消费者落后、缓冲区写满时发生）
+_POLL_INTERVAL = 0.0005
+# 消费者单次休眠上限：waiting标志与head的读写没有内存屏障，极少数情况下唤醒会丢失，
+# 最多延迟这么久后重新检查
+_WAKE_CHECK = 0.05
+
+
+class ShmRingQueue:
+    """单生产者/单消费者的共享内存环形队列
+
+    接口与multiprocessing.Queue保持一致(put/get/get_nowait/empty/qsize/close)，
+    可直接放入写入进程的队列字典。``(stream_type, bytes)`` 和
+    ``(stream_type, bytes, int)`` 形式的数据直接拷贝进共享内存，不经过pickle；
+    其他对象（例如深度快照dict）pickle后写入。
+
+    生产者先写payload再发布head，消费者先拷贝payload再发布tail，
+    计数器为对齐的8字节写入。有多个生产者时（例如订单簿进程与行情进程共用队列）
+    需设置 multi_producer=True，在生产者一侧加锁。
+    
+    队列为空时消费者置位waiting标志后在信号量上休眠，生产者发布head后发现标志置位
+    才清除标志并release一次，非空时put不产生额外的系统调用。
+    
+    创建者进程close()时删除共享内存段；反序列化得到的副本（其他进程）close()只解除映射。
+    对象被回收时自动close()。
+    """
+
+    def __init__(self, size: int = DEFAULT_BUFFER_SIZE, multi_producer: bool = False):
+        if shared_memory is None:
+            raise OSError("multiprocessing.shared_memory is not available")
+
+        self._shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + size)
+        self._owner_pid = os.getpid()
+        self._lock = multiprocessing.Lock() if multi_producer else None
+        self._wakeup = multiprocessing.Semaphore(0)
+        # 新建的共享内存段由内核清零，计数器初始即为0
+        self._attach()
+
+    def _attach(self):
+        buf = self._shm.buf
+        self._counters = buf[:_COUNTERS * 8].cast('Q')
+        self._data = buf[_HEADER_SIZE:]
+        self._capacity = len(self._data)
+
+    def __getstate__(self):
+        return {'name': self._shm.name, 'lock': self._lock, 'wakeup': self._wakeup}
+
+    def __setstate__(self, state):
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._owner_pid = None
+        self._lock = state['lock']
+        self._wakeup = state['wakeup']
+        self._attach()
+
+    @staticmethod
+    def _encode(item: Any) -> Tuple[int, int, bytes]:
+        """将队列元素编码为(标签, 附加整数, payload)"""
+        if item is None:
+            return _TAG_NONE, 0, b''
+
+        if type(item) is tuple and 2 <= len(item) <= 3 and isinstance(item[1], (bytes, bytearray)):
+            tag = _TAG_BY_TYPE.get(item[0])
+            if tag is not None:
+                if len(item) == 2:
+                    return tag, 0, item[1]
+                if isinstance(item[2], int):
+                    return tag | _TAG_HAS_AUX, item[2], item[1]
+
+        return _TAG_PICKLE, 0, pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(tag: int, aux: int, payload: bytes) -> Any:
+        """将(标签, 附加整数, payload)还原为队列元素"""
+        if tag == _TAG_NONE:
+            return None
+        if tag == _TAG_PICKLE:
+            return pickle.loads(payload)
+
+        stream_type = STREAM_TAGS[(tag & ~_TAG_HAS_AUX) - 1]
+        if tag & _TAG_HAS_AUX:
+            return stream_type, payload, aux
+        return stream_type, payload
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """写入一条数据，缓冲区满时按block/timeout等待，超时抛出queue.Full"""
+        tag, aux, payload = self._encode(item)
+
+        if self._lock is None:
+            self._put(tag, aux, payload, block, timeout)
+            return
+
+        if not self._lock.acquire(block, timeout):
+            raise queue.Full
+        try:
+            self._put(tag, aux, payload, block, timeout)
+        finally:
+            self._lock.release()
+
+    def _put(self, tag: int, aux: int, payload: bytes, block: bool, timeout: Optional[float]):
+        capacity = self._capacity
+        counters = self._counters
+        length = len(payload)
+        need = _RECORD.size + length
+        if need > capacity:
+            raise ValueError(f"record of {length} bytes exceeds ring buffer capacity")
+
+        head = counters[0]
+        offset = head % capacity
+        contiguous = capacity - offset
+        # 记录不跨越缓冲区末尾，剩余空间不足时填充并回绕到开头
+        padding = contiguous if contiguous < need else 0
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while capacity - (head - counters[1]) < padding + need:
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Full
+            time.sleep(_POLL_INTERVAL)
+
+        data = self._data
+        if padding:
+            if padding >= _RECORD.size:
+                _RECORD.pack_into(data, offset, _WRAP_MARKER, 0, 0)
+            offset = 0
+
+        _RECORD.pack_into(data, offset, length, tag, aux)
+        start = offset + _RECORD.size
+        data[start:start + length] = payload
+
+        counters[2] += 1
+        # 最后发布head，消费者此时才能看到完整记录
+        counters[0] = head + padding + need
+        
+        if counters[_WAITING]:
+            counters[_WAITING] = 0
+            self._wakeup.release()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """读取一条数据，队列为空时按block/timeout等待，超时抛出queue.Empty"""
+        capacity = self._capacity
+        counters = self._counters
+        tail = counters[1]
+
+        if counters[0] == tail:
+            if not block:
+                raise queue.Empty
+            self._wait_for_data(tail, timeout)
+
+        data = self._data
+        offset = tail % capacity
+        contiguous = capacity - offset
+        if contiguous < _RECORD.size:
+            tail += contiguous
+            offset = 0
+        else:
+            length, tag, aux = _RECORD.unpack_from(data, offset)
+            if length == _WRAP_MARKER:
+                tail += contiguous
+                offset = 0
+
+        length, tag, aux = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        payload = bytes(data[start:start + length])
+
+        counters[3] += 1
+        # payload拷贝完成后再发布tail，释放空间给生产者
+        counters[1] = tail + _RECORD.size + length
+
+        return self._decode(tag, aux, payload)
+
+    def _wait_for_data(self, tail: int, timeout: Optional[float]) -> None:
+        """在信号量上休眠直到head越过tail，超时抛出queue.Empty"""
+        counters = self._counters
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            counters[_WAITING] = 1
+            # 置位后再检查一次，避免生产者在置位之前发布的数据无人唤醒
+            if counters[0] != tail:
+                counters[_WAITING] = 0
+                return
+            
+            wait = _WAKE_CHECK
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    counters[_WAITING] = 0
+                    raise queue.Empty
+                wait = min(wait, remaining)
+            # 唤醒可能来自更早的一次等待（多余的release），循环重新检查head即可
+            self._wakeup.acquire(timeout=wait)
+            if counters[0] != tail:
+                counters[_WAITING] = 0
+                return
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def put_nowait(self, item: Any) -> None:
+        self.put(item, block=False)
+
+    def empty(self) -> bool:
+        return self._counters[0] == self._counters[1]
+
+    def qsize(self) -> int:
+        return self._counters[2] - self._counters[3]
+
+    def close(self) -> None:
+        """释放本进程的共享内存映射；创建者进程同时删除共享内存段（可重复调用）"""
+        shm = getattr(self, '_shm', None)
+        if shm is None:
+            return
+        self._shm = None
+        self._counters.release()
+        self._data.release()
+        try:
+            # fork出的子进程持有创建者对象的副本，只有创建者进程本身删除共享内存段
+            if self._owner_pid == os.getpid():
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+        finally:
+            shm.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def join_thread(self) -> None:
+        """与multiprocessing.Queue接口兼容，共享内存队列没有后台线程"""
+        pass
+
+
+def create_data_queue(maxsize: int = 0, transport: str = 'shm',
+                      buffer_size: int = DEFAULT_BUFFER_SIZE, multi_producer: bool = False):
+    """创建进程间数据队列，共享内存不可用时回退到multiprocessing.Queue"""
+    if transport == 'shm':
+        try:
+            return ShmRingQueue(buffer_size, multi_producer=multi_producer)
+        except OSError as e:
+            print(f"共享内存队列不可用，回退到multiprocessing.Queue: {e}")
+
+    return multiprocessing.Queue(maxsize=maxsize)
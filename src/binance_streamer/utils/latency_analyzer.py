@@ -4,12 +4,153 @@
 用于分析币安数据流的接收延迟
 """
 
-import csv
+import logging
+import math
+import os
 import statistics
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import json
 
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba为可选依赖，缺失时使用numpy向量化实现
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# 分块读取CSV的行数，内存占用与文件大小无关
+_CHUNK_ROWS = 500_000
+
+# 大于该值的localtime为微秒（秒级时间戳在数千年内都小于1e11）
+_LOCALTIME_US_THRESHOLD = 1e11
+
+
+def _latency_kernel_numpy(event_ms: np.ndarray, local_s: np.ndarray):
+    """计算延迟（毫秒）及 (均值, 离差平方和, 最小值, 最大值)"""
+    latencies = (local_s - event_ms * 1e-3) * 1000.0
+    mean = latencies.mean()
+    m2 = float(((latencies - mean) ** 2).sum())
+    return latencies, float(mean), m2, float(latencies.min()), float(latencies.max())
+
+
+if njit is not None:
+    @njit(parallel=True)
+    def _latency_kernel(event_ms, local_s):
+        """numba编译版：延迟计算与min/max/sum融合为一次并行遍历"""
+        n = event_ms.shape[0]
+        latencies = np.empty(n)
+        total = 0.0
+        low = np.inf
+        high = -np.inf
+        for i in prange(n):
+            latency = (local_s[i] - event_ms[i] * 1e-3) * 1000.0
+            latencies[i] = latency
+            total += latency
+            low = min(low, latency)
+            high = max(high, latency)
+        
+        mean = total / n
+        m2 = 0.0
+        for i in prange(n):
+            delta = latencies[i] - mean
+            m2 += delta * delta
+        return latencies, mean, m2, low, high
+else:
+    _latency_kernel = _latency_kernel_numpy
+
+
+class StreamingLatencyStats:
+    """
+    单遍在线延迟统计
+    
+    均值/标准差使用Welford算法，分位数由固定分辨率的稀疏直方图估算，
+    内存占用只与延迟取值范围有关，与样本数无关。
+    """
+    
+    def __init__(self, resolution_ms: float = 0.1):
+        self.resolution_ms = resolution_ms
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._histogram: Dict[int, int] = defaultdict(int)
+    
+    def add(self, latency: float):
+        """加入一个延迟样本（毫秒）"""
+        self.count += 1
+        delta = latency - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (latency - self.mean)
+        if latency < self.min:
+            self.min = latency
+        if latency > self.max:
+            self.max = latency
+        self._histogram[math.floor(latency / self.resolution_ms)] += 1
+    
+    def add_chunk(self, event_ms: np.ndarray, local_s: np.ndarray) -> np.ndarray:
+        """
+        加入一批样本，返回该批次的延迟数组（毫秒）
+        
+        批次统计量由编译内核计算，再按Chan并行算法合并到累计的均值/方差中。
+        """
+        if not len(event_ms):
+            return np.empty(0)
+        
+        latencies, mean, m2, low, high = _latency_kernel(event_ms, local_s)
+        n = len(latencies)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        
+        bins, counts = np.unique(np.floor(latencies / self.resolution_ms).astype(np.int64),
+                                 return_counts=True)
+        histogram = self._histogram
+        for index, count in zip(bins.tolist(), counts.tolist()):
+            histogram[index] += count
+        
+        return latencies
+    
+    @property
+    def stdev(self) -> float:
+        """样本标准差，与statistics.stdev一致"""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0
+    
+    def percentile(self, percentile: float) -> float:
+        """按直方图估算百分位数，误差不超过一个分辨率区间"""
+        if not self.count:
+            return 0
+        target = min(int(self.count * percentile / 100), self.count - 1)
+        seen = 0
+        for index in sorted(self._histogram):
+            seen += self._histogram[index]
+            if seen > target:
+                value = (index + 0.5) * self.resolution_ms
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    def to_dict(self) -> Dict:
+        """输出与analyze_file_latency相同格式的统计结果"""
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'median': self.percentile(50),
+            'stdev': self.stdev,
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
 
 class LatencyAnalyzer:
     """数据延迟分析器"""
@@ -37,37 +178,16 @@ class LatencyAnalyzer:
             local_time_field: 本地接收时间字段名
             
         Returns:
-            包含延迟统计信息的字典
+            包含延迟统计信息的字典（中位数和分位数为直方图近似值）
         """
-        latencies = []
-        
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    # 事件时间（毫秒）转为秒
-                    event_time = float(row[event_time_field]) / 1000
-                    # 本地接收时间（已经是秒）
-                    local_time = float(row[local_time_field])
-                    # 计算延迟（毫秒）
-                    latency = (local_time - event_time) * 1000
-                    latencies.append(latency)
-                except (KeyError, ValueError):
-                    continue
+        stats = StreamingLatencyStats()
+        for event_ms, local_s in self._iter_chunks(file_path, event_time_field, local_time_field):
+            stats.add_chunk(event_ms, local_s)
         
-        if not latencies:
+        if not stats.count:
             return {}
         
-        return {
-            'count': len(latencies),
-            'min': min(latencies),
-            'max': max(latencies),
-            'mean': statistics.mean(latencies),
-            'median': statistics.median(latencies),
-            'stdev': statistics.stdev(latencies) if len(latencies) > 1 else 0,
-            'p95': self._percentile(latencies, 95),
-            'p99': self._percentile(latencies, 99)
-        }
+        return stats.to_dict()
     
     def analyze_latency_distribution(self, 
                                     file_path: str,
@@ -84,31 +204,55 @@ class LatencyAnalyzer:
         Returns:
             (延迟分布字典, 总样本数)
         """
-        latencies = []
+        lows = np.array([low for low, _, _ in self.latency_buckets])
+        counts = np.zeros(len(lows), dtype=np.int64)
+        total = 0
         
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    event_time = float(row[event_time_field]) / 1000
-                    local_time = float(row[local_time_field])
-                    latency = (local_time - event_time) * 1000
-                    latencies.append(latency)
-                except (KeyError, ValueError):
-                    continue
+        # 分块统计延迟分布，按区间下界二分定位所属区间
+        for event_ms, local_s in self._iter_chunks(file_path, event_time_field, local_time_field):
+            if not len(event_ms):
+                continue
+            latencies = _latency_kernel(event_ms, local_s)[0]
+            indices = np.searchsorted(lows, latencies, side='right') - 1
+            counts += np.bincount(indices[indices >= 0], minlength=len(lows))
+            total += len(latencies)
         
-        if not latencies:
+        if not total:
             return {}, 0
         
-        # 统计延迟分布
-        distribution = {}
-        for latency in latencies:
-            for low, high, label in self.latency_buckets:
-                if low <= latency < high:
-                    distribution[label] = distribution.get(label, 0) + 1
-                    break
+        distribution = {label: int(count)
+                        for (_, _, label), count in zip(self.latency_buckets, counts) if count}
+        return distribution, total
+    
+    @staticmethod
+    def _iter_chunks(file_path: str,
+                     event_time_field: str,
+                     local_time_field: str) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        分块读取CSV，产出(事件时间毫秒, 本地接收时间秒)的float64数组，跳过无法解析的行
         
-        return distribution, len(latencies)
+        文件为空、缺少所需字段或中途出现格式错误时记录警告（含已读取的行数）并停止读取该文件
+        """
+        rows_read = 0
+        try:
+            reader = pd.read_csv(file_path,
+                                 usecols=[event_time_field, local_time_field],
+                                 chunksize=_CHUNK_ROWS)
+            for chunk in reader:
+                rows_read += len(chunk)
+                event_ms = pd.to_numeric(chunk[event_time_field], errors='coerce').to_numpy(np.float64)
+                local_s = pd.to_numeric(chunk[local_time_field], errors='coerce').to_numpy(np.float64)
+                # 写入器以整数微秒记录localtime，旧文件为浮点秒，按数量级区分
+                local_s = np.where(local_s > _LOCALTIME_US_THRESHOLD, local_s * 1e-6, local_s)
+                valid = ~(np.isnan(event_ms) | np.isnan(local_s))
+                if not valid.all():
+                    event_ms = event_ms[valid]
+                    local_s = local_s[valid]
+                yield np.ascontiguousarray(event_ms), np.ascontiguousarray(local_s)
+        except ValueError as e:
+            # 包括pandas的ParserError/EmptyDataError和解码错误，后续数据不再统计
+            logger.warning("读取 %s 失败（已读取 %d 行数据），跳过文件剩余部分: %s",
+                           file_path, rows_read, e)
     
     def analyze_directory(self, data_dir: str = './data') -> Dict:
         """
@@ -121,40 +265,56 @@ class LatencyAnalyzer:
             所有文件的延迟分析结果
         """
         results = {}
-        data_path = Path(data_dir)
-        
-        if not data_path.exists():
-            return results
         
         # 遍历所有CSV文件
-        for csv_file in data_path.glob('**/*.csv'):
-            # 跳过深度快照文件
-            if 'depth_snapshot' in csv_file.name:
-                continue
-                
-            # 获取交易对和数据类型
-            symbol = csv_file.parent.name
-            
-            if 'aggtrade' in csv_file.name:
+        for csv_path, symbol, name in self._iter_csv_files(data_dir):
+            # 获取数据类型
+            if 'aggtrade' in name:
                 data_type = 'aggtrade'
-            elif 'depth' in csv_file.name:
+            elif 'depth' in name:
                 data_type = 'depth'
-            elif 'kline' in csv_file.name:
+            elif 'kline' in name:
                 data_type = 'kline'
             else:
                 continue
             
             # 分析延迟
-            stats = self.analyze_file_latency(str(csv_file))
+            stats = self.analyze_file_latency(csv_path)
             if stats:
                 key = f"{symbol}_{data_type}"
                 results[key] = {
-                    'file': str(csv_file),
+                    'file': csv_path,
                     'stats': stats
                 }
         
         return results
     
+    @classmethod
+    def _iter_csv_files(cls, directory: str, top_level: bool = True) -> Iterator[Tuple[str, str, str]]:
+        """
+        递归遍历目录，产出(文件路径, 所在目录名即交易对, 文件名)
+        
+        使用os.scandir，文件类型判断复用目录项缓存的信息，不再逐个stat；
+        深度快照文件在这里直接跳过。数据根目录下的文件是按类型聚合写入的
+        （含多个交易对，没有交易对目录），不按交易对统计，可用 --file 单独分析。
+        """
+        try:
+            entries = os.scandir(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        
+        symbol = os.path.basename(os.path.normpath(directory))
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from cls._iter_csv_files(entry.path, top_level=False)
+                elif not entry.name.endswith(('.csv', '.csv.zst')) or 'depth_snapshot' in entry.name:
+                    continue
+                elif top_level:
+                    logger.info("跳过数据根目录下的聚合文件 %s", entry.path)
+                else:
+                    yield entry.path, symbol, entry.name
+    
     def print_analysis_report(self, data_dir: str = './data'):
         """
         打印延迟分析报告
@@ -217,15 +377,6 @@ class LatencyAnalyzer:
                 print("  ✅ 延迟表现: 良好 (适合实时分析)")
             else:
                 print("  ⚠️ 延迟表现: 一般 (可能需要优化网络)")
-    
-    @staticmethod
-    def _percentile(data: List[float], percentile: float) -> float:
-        """计算百分位数"""
-        if not data:
-            return 0
-        sorted_data = sorted(data)
-        index = int(len(sorted_data) * percentile / 100)
-        return sorted_data[min(index, len(sorted_data) - 1)]
 
 
 def main():
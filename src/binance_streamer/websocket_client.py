@@ -1,53 +1,116 @@
 import asyncio
 import websockets
-import json
 import time
 import multiprocessing
+from typing import Callable, Dict, List, Union
 
-async def binance_websocket_client(symbol: str, data_queue: multiprocessing.Queue, streams: list = None):
-    """Connects to Binance WebSocket streams and puts incoming data into a queue."""
-    if streams is None:
-        streams = ['aggTrade', 'depth@0ms', 'kline_1m']
-    
-    # 构建流名称列表
-    stream_names = []
-    for stream in streams:
-        # Handle streams that already contain @ (like depth@0ms)
-        if '@' in stream:
-            # depth@0ms -> btcusdt@depth@0ms
-            stream_names.append(f"{symbol.lower()}@{stream}")
-        else:
-            # aggTrade -> btcusdt@aggTrade
-            stream_names.append(f"{symbol.lower()}@{stream}")
-    
-    url = f"wss://fstream.binance.com/stream?streams={'/'.join(stream_names)}"
+from ._reconnect import ReconnectBackoff
+
+# Binance合约组合流地址，单个连接最多订阅200个流
+BINANCE_STREAM_URL = "wss://fstream.binance.com/stream"
+MAX_STREAMS_PER_CONNECTION = 200
+
+# 组合流消息固定以 {"stream":"<name>" 开头，按前缀定位流名称即可路由，无需解析JSON
+_STREAM_PREFIX = b'{"stream":"'
+_STREAM_NAME_START = len(_STREAM_PREFIX)
+
+def build_stream_names(symbols: List[str], streams: List[str]) -> List[str]:
+    """Builds combined stream names from the cross-product of symbols × streams."""
+    # aggTrade -> btcusdt@aggTrade, depth@0ms -> btcusdt@depth@0ms
+    return [f"{symbol.lower()}@{stream}" for symbol in symbols for stream in streams]
+
+def classify_stream(stream: bytes):
+    """Maps a raw stream name to the writer's stream type."""
+    if b'@aggTrade' in stream:
+        return 'aggtrade'
+    elif b'@depth' in stream:
+        return 'depth'
+    elif b'@kline' in stream:
+        return 'kline'
+    return None
+
+async def _run_stream(stream_names: List[str], on_message: Callable[[bytes, bytes, int], None],
+                      label: str):
+    """Shared connect/recv/reconnect loop for all Binance WebSocket clients.
+
+    Every combined-stream message is handed to ``on_message(stream, message, localtime_ns)``
+    as raw bytes together with its stream name; the callback decides what to do with it.
+    """
+    if len(stream_names) > MAX_STREAMS_PER_CONNECTION:
+        raise ValueError(
+            f"{len(stream_names)} streams exceed the per-connection limit of {MAX_STREAMS_PER_CONNECTION}"
+        )
+
+    url = f"{BINANCE_STREAM_URL}?streams={'/'.join(stream_names)}"
+    backoff = ReconnectBackoff()
 
     while True:
         try:
             async with websockets.connect(url) as websocket:
-                print(f"Connected to Binance WebSocket for {symbol}")
+                print(f"Connected to Binance WebSocket for {label}")
+                backoff.reset()
                 while True:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    
-                    # Add local timestamp
-                    data['localtime'] = time.time()
-                    
-                    stream = data['stream']
-                    stream_type = None
-                    if 'aggTrade' in stream:
-                        stream_type = 'aggtrade'
-                    elif 'depth' in stream:
-                        stream_type = 'depth'
-                    elif 'kline' in stream:
-                        stream_type = 'kline'
-                    
-                    if stream_type:
-                        data_queue.put((stream_type, data))
+                    # 保持原始bytes，是否解析JSON由回调决定
+                    message = await websocket.recv(decode=False)
+                    localtime_ns = time.time_ns()
+
+                    if not message.startswith(_STREAM_PREFIX):
+                        continue
+                    stream = message[_STREAM_NAME_START:message.find(b'"', _STREAM_NAME_START)]
+                    on_message(stream, message, localtime_ns)
 
         except websockets.exceptions.ConnectionClosed as e:
-            print(f"Connection closed: {e}. Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
+            delay = backoff.next_delay()
+            print(f"Connection closed for {label}: {e}. Reconnecting in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
         except Exception as e:
-            print(f"An error occurred: {e}. Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
+            delay = backoff.next_delay()
+            print(f"An error occurred for {label}: {e}. Reconnecting in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+
+async def binance_websocket_client(symbols: Union[str, List[str]],
+                                   data_queue: Union[multiprocessing.Queue, Dict[str, multiprocessing.Queue]],
+                                   streams: list = None):
+    """Connects to Binance combined WebSocket streams and puts incoming data into a queue.
+
+    ``symbols`` may be a single symbol or a list of symbols sharing one connection.
+    ``data_queue`` may be a single queue or a ``{symbol: queue}`` mapping, in which
+    case every message is routed to the queue of the symbol found in its stream name.
+    Items are ``(stream_type, raw_message_bytes, localtime_ns)``; the writer parses them.
+    """
+    if streams is None:
+        streams = ['aggTrade', 'depth@0ms', 'kline_1m']
+    if isinstance(symbols, str):
+        symbols = [symbols]
+
+    # 构建流名称列表
+    stream_names = build_stream_names(symbols, streams)
+
+    # 同一个连接的消息按流名称中的交易对分发到各自队列
+    if isinstance(data_queue, dict):
+        symbol_queues = data_queue
+    else:
+        symbol_queues = {symbol.upper(): data_queue for symbol in symbols}
+
+    # 流名称 -> (队列, 数据流类型)，热路径只需一次字典查找
+    routes = {}
+    for name in stream_names:
+        symbol_queue = symbol_queues.get(name.split('@', 1)[0].upper())
+        stream_type = classify_stream(name.encode())
+        if symbol_queue is not None and stream_type:
+            routes[name.encode()] = (symbol_queue, stream_type)
+
+    def route_message(stream: bytes, message: bytes, localtime_ns: int):
+        route = routes.get(stream)
+        if route is None:
+            # 服务端返回的流名称与订阅名称不一致时按内容分类并缓存
+            symbol_queue = symbol_queues.get(stream.split(b'@', 1)[0].decode().upper())
+            stream_type = classify_stream(stream)
+            if symbol_queue is None or not stream_type:
+                return
+            route = routes[stream] = (symbol_queue, stream_type)
+
+        symbol_queue, stream_type = route
+        symbol_queue.put((stream_type, message, localtime_ns))
+
+    await _run_stream(stream_names, route_message, ','.join(symbols))
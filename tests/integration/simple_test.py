@@ -8,7 +8,12 @@ import asyncio
 import sys
 import os
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+# 连接真实WebSocket并安装uvloop事件循环策略，run_all_tests在独立进程中运行本脚本（带超时）
+_ISOLATE = True
 
 async def simple_live_test():
     """简化的实时测试"""
@@ -17,8 +22,10 @@ async def simple_live_test():
     from src.binance_streamer.websocket_client import binance_websocket_client
     from src.binance_streamer.file_writer import (
         _flush_aggtrade_batch_optimized,
-        _flush_depth_batch_optimized
+        _flush_depth_batch_optimized,
+        decode_stream_message
     )
+    from tests.test_utils import redirect_output_to_test_root
     
     # 创建数据收集
     collected_data = []
@@ -28,6 +35,9 @@ async def simple_live_test():
             self.data = []
         
         def put(self, item):
+            # WebSocket客户端传递原始bytes，这里按写入进程的方式解析
+            stream_type, message, localtime_ns = item
+            item = (stream_type, decode_stream_message(message, localtime_ns))
             self.data.append(item)
             collected_data.append(item)
             print(f"📊 收到数据: {item[0]} - {item[1].get('stream', 'unknown')}")
@@ -62,24 +72,25 @@ async def simple_live_test():
     # 测试优化版写入
     print("\n💾 测试优化版写入...")
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
-        if aggtrade_data:
-            aggtrade_records = [item[1] for item in aggtrade_data]
-            _flush_aggtrade_batch_optimized('LIVETEST', aggtrade_records)
-            print(f"✅ aggtrade写入完成: {len(aggtrade_records)}条")
-        
-        if depth_data:
-            depth_records = [item[1] for item in depth_data]
-            _flush_depth_batch_optimized('LIVETEST', depth_records)
-            print(f"✅ depth写入完成: {len(depth_records)}条")
+        with redirect_output_to_test_root():
+            if aggtrade_data:
+                aggtrade_records = [item[1] for item in aggtrade_data]
+                _flush_aggtrade_batch_optimized('LIVETEST', aggtrade_records)
+                print(f"✅ aggtrade写入完成: {len(aggtrade_records)}条")
+            
+            if depth_data:
+                depth_records = [item[1] for item in depth_data]
+                _flush_depth_batch_optimized('LIVETEST', depth_records)
+                print(f"✅ depth写入完成: {len(depth_records)}条")
     
     except Exception as e:
         print(f"❌ 写入失败: {e}")
         return False
     
-    write_time = time.time() - start_time
+    write_time = time.perf_counter() - start_time
     total_records = len(aggtrade_data) + len(depth_data)
     
     print(f"\n⚡ 写入性能:")
@@ -93,7 +104,8 @@ def verify_output_files():
     """验证输出文件"""
     print("\n=== 验证输出文件 ===")
     
-    data_dir = './data/LIVETEST'
+    from tests.test_utils import TEST_ROOT
+    data_dir = os.path.join(TEST_ROOT, 'LIVETEST')
     if not os.path.exists(data_dir):
         print("❌ 数据目录不存在")
         return False
@@ -127,6 +139,8 @@ def verify_output_files():
 if __name__ == '__main__':
     success = False
     try:
+        from src.binance_streamer._eventloop import install_uvloop
+        install_uvloop()
         success = asyncio.run(simple_live_test())
         if success:
             verify_output_files()
@@ -41,6 +41,8 @@ def test_live_data_collection():
     
     try:
         # 运行数据收集
+        from src.binance_streamer._eventloop import install_uvloop
+        install_uvloop()
         asyncio.run(collect_data())
     except asyncio.TimeoutError:
         print("⏰ 20秒数据收集完成")
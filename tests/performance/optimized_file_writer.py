@@ -4,11 +4,19 @@
 """
 import csv
 import os
+import sys
 import json
 import time
-from typing import List, Dict, Any
+from operator import itemgetter
+from typing import List, Dict, Tuple
 from datetime import datetime
 
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from tests.test_utils import TEST_ROOT
+
 # CSV字段定义 - 保持与原有格式一致
 AGGTRADE_FIELDS = [
     'localtime', 'stream', 'e', 'E', 'a', 's', 'p', 'q', 'f', 'l', 'T', 'm'
@@ -29,6 +37,15 @@ ORDERBOOK_FIELDS = [
     'localtime', 'symbol', 'best_bid', 'best_ask', 'spread', 'update_count'
 ]
 
+# 一次C调用取出多个字段（按CSV列顺序），代替逐个字典下标访问
+_RECORD_FETCH = itemgetter('localtime', 'data')
+_AGGTRADE_FETCH = itemgetter('e', 'E', 'a', 's', 'p', 'q', 'f', 'l', 'T', 'm')
+_DEPTH_FETCH = itemgetter('e', 'E', 'T', 's', 'U', 'u', 'pu', 'b', 'a')
+_KLINE_EVENT_FETCH = itemgetter('e', 'E', 'k')
+_KLINE_FETCH = itemgetter('s', 't', 'T', 's', 'i', 'f', 'L', 'o', 'c', 'h', 'l',
+                          'v', 'n', 'x', 'q', 'V', 'Q', 'B')
+_ORDERBOOK_FETCH = itemgetter('localtime', 'symbol', 'best_bid', 'best_ask', 'spread', 'update_count')
+
 def ensure_csv_header(filepath: str, fields: List[str]) -> bool:
     """确保CSV文件有正确的头部，如果文件不存在则创建
     
@@ -43,18 +60,17 @@ def ensure_csv_header(filepath: str, fields: List[str]) -> bool:
         
         # 写入header
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fields)
-            writer.writeheader()
+            csv.writer(f).writerow(fields)
         return True
     
     return False
 
-def append_csv_rows(filepath: str, rows: List[Dict[str, Any]], fields: List[str]) -> None:
+def append_csv_rows(filepath: str, rows: List[Tuple], fields: List[str]) -> None:
     """直接append写入CSV行，无需pandas
     
     Args:
         filepath: CSV文件路径
-        rows: 要写入的行数据
+        rows: 要写入的行数据（按fields顺序的元组）
         fields: CSV字段顺序
     """
     if not rows:
@@ -65,13 +81,12 @@ def append_csv_rows(filepath: str, rows: List[Dict[str, Any]], fields: List[str]
     
     # 直接append写入
     with open(filepath, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fields)
-        writer.writerows(rows)
+        csv.writer(f).writerows(rows)
 
 def get_daily_filename(stream_type: str, symbol: str) -> str:
     """生成日期文件名"""
     today = datetime.now().strftime('%Y%m%d')
-    data_dir = f"./data/{symbol}"
+    data_dir = os.path.join(TEST_ROOT, symbol)
     return f"{data_dir}/{stream_type}_{symbol}_{today}.csv"
 
 # 优化版批量写入函数
@@ -84,22 +99,8 @@ def flush_aggtrade_batch_optimized(symbol: str, records: List[Dict]) -> None:
     # 直接构造CSV行数据
     csv_rows = []
     for data in records:
-        trade_data = data['data']
-        row = {
-            'localtime': data['localtime'],
-            'stream': data.get('stream'),
-            'e': trade_data['e'],
-            'E': trade_data['E'],
-            'a': trade_data['a'],
-            's': trade_data['s'],
-            'p': trade_data['p'],
-            'q': trade_data['q'],
-            'f': trade_data['f'],
-            'l': trade_data['l'],
-            'T': trade_data['T'],
-            'm': trade_data['m']
-        }
-        csv_rows.append(row)
+        localtime, trade_data = _RECORD_FETCH(data)
+        csv_rows.append((localtime, data.get('stream'), *_AGGTRADE_FETCH(trade_data)))
     
     # 直接写入CSV
     filename = get_daily_filename('aggtrade', symbol)
@@ -113,23 +114,11 @@ def flush_depth_batch_optimized(symbol: str, records: List[Dict]) -> None:
     # 直接构造CSV行数据
     csv_rows = []
     for data in records:
-        depth_data = data['data']
-        row = {
-            'localtime': data['localtime'],
-            'stream': data.get('stream'),
-            'e': depth_data['e'],
-            'E': depth_data['E'],
-            'T': depth_data['T'],
-            's': depth_data['s'],
-            'U': depth_data['U'],
-            'u': depth_data['u'],
-            'pu': depth_data['pu'],
-            'bids': json.dumps(depth_data['b']),  # JSON序列化保持兼容性
-            'asks': json.dumps(depth_data['a']),
-            'bids_count': len(depth_data['b']),
-            'asks_count': len(depth_data['a'])
-        }
-        csv_rows.append(row)
+        localtime, depth_data = _RECORD_FETCH(data)
+        e, E, T, s, U, u, pu, b, a = _DEPTH_FETCH(depth_data)
+        csv_rows.append((localtime, data.get('stream'), e, E, T, s, U, u, pu,
+                         json.dumps(b), json.dumps(a),  # JSON序列化保持兼容性
+                         len(b), len(a)))
     
     # 直接写入CSV
     filename = get_daily_filename('depth', symbol)
@@ -143,32 +132,9 @@ def flush_kline_batch_optimized(symbol: str, records: List[Dict]) -> None:
     # 直接构造CSV行数据
     csv_rows = []
     for data in records:
-        kline_data = data['data']['k']
-        row = {
-            'localtime': data['localtime'],
-            'stream': data.get('stream'),
-            'event_type': data['data']['e'],
-            'event_time': data['data']['E'],
-            's': kline_data['s'],
-            'k_t': kline_data['t'],
-            'k_T': kline_data['T'],
-            'k_s': kline_data['s'],
-            'k_i': kline_data['i'],
-            'k_f': kline_data['f'],
-            'k_L': kline_data['L'],
-            'k_o': kline_data['o'],
-            'k_c': kline_data['c'],
-            'k_h': kline_data['h'],
-            'k_l': kline_data['l'],
-            'k_v': kline_data['v'],
-            'k_n': kline_data['n'],
-            'k_x': kline_data['x'],
-            'k_q': kline_data['q'],
-            'k_V': kline_data['V'],
-            'k_Q': kline_data['Q'],
-            'k_B': kline_data['B']
-        }
-        csv_rows.append(row)
+        localtime, event = _RECORD_FETCH(data)
+        e, E, kline_data = _KLINE_EVENT_FETCH(event)
+        csv_rows.append((localtime, data.get('stream'), e, E, *_KLINE_FETCH(kline_data)))
     
     # 直接写入CSV
     filename = get_daily_filename('kline_1m', symbol)
@@ -180,17 +146,7 @@ def flush_orderbook_batch_optimized(symbol: str, records: List[Dict]) -> None:
         return
     
     # 直接构造CSV行数据
-    csv_rows = []
-    for data in records:
-        row = {
-            'localtime': data['localtime'],
-            'symbol': data['symbol'],
-            'best_bid': data['best_bid'],
-            'best_ask': data['best_ask'],
-            'spread': data['spread'],
-            'update_count': data['update_count']
-        }
-        csv_rows.append(row)
+    csv_rows = [_ORDERBOOK_FETCH(data) for data in records]
     
     # 直接写入CSV
     filename = get_daily_filename('orderbook', symbol)
@@ -206,15 +162,19 @@ def benchmark_write_performance():
     print("=== 写入性能对比测试 ===")
     
     # 生成测试数据
-    test_records = []
-    for i in range(5000):
-        record = {
-            'localtime': time.time(),
+    count = 5000
+    test_records = [None] * count  # 预分配
+    # 时间戳在循环外取一次，避免生成数据的开销混入计时
+    now = time.time()
+    now_ms = int(now * 1000)
+    for i in range(count):
+        test_records[i] = {
+            'localtime': now + i * 1e-6,
             'stream': 'btcusdt@depth@0ms',
             'data': {
                 'e': 'depthUpdate',
-                'E': int(time.time() * 1000),
-                'T': int(time.time() * 1000),
+                'E': now_ms + i,
+                'T': now_ms + i,
                 's': 'BTCUSDT',
                 'U': i,
                 'u': i + 1,
@@ -223,11 +183,10 @@ def benchmark_write_performance():
                 'a': [['101.0', '1.0'], ['102.0', '2.0']]
             }
         }
-        test_records.append(record)
     
     # 测试原来的pandas写入
     print("\n1. 测试pandas写入...")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # 模拟原来的写入方式
     df_data = []
@@ -250,20 +209,20 @@ def benchmark_write_performance():
         df_data.append(depth_record)
     
     df = pd.DataFrame(df_data)
-    pandas_filename = './data/TESTBTC/depth_pandas_test.csv'
-    os.makedirs('./data/TESTBTC', exist_ok=True)
+    pandas_filename = os.path.join(TEST_ROOT, 'TESTBTC', 'depth_pandas_test.csv')
+    os.makedirs(os.path.dirname(pandas_filename), exist_ok=True)
     df.to_csv(pandas_filename, index=False)
     
-    pandas_time = time.time() - start_time
+    pandas_time = time.perf_counter() - start_time
     print(f"pandas写入耗时: {pandas_time:.4f}s")
     
     # 测试优化版直接CSV写入
     print("\n2. 测试优化版直接CSV写入...")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     flush_depth_batch_optimized('TESTBTC2', test_records)
     
-    optimized_time = time.time() - start_time
+    optimized_time = time.perf_counter() - start_time
     print(f"优化版写入耗时: {optimized_time:.4f}s")
     
     # 性能提升计算
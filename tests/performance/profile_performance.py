@@ -10,28 +10,36 @@ import threading
 import time
 import multiprocessing
 import json
+import tempfile
 from collections import defaultdict
 
 # 添加项目根目录到路径
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
+# multiprocessing.Pool需要按模块名pickle任务函数，run_all_tests在独立进程中运行本脚本
+_ISOLATE = True
+
 def profile_file_writer():
     """分析文件写入性能"""
     print("=== 分析文件写入性能 ===")
     
     from src.binance_streamer.file_writer import multi_queue_writer_process, _flush_depth_batch
+    from tests.test_utils import redirect_output_to_test_root
     
     # 模拟大量深度数据
-    test_data = []
-    for i in range(5000):
-        test_data.append({
-            'localtime': time.time(),
+    count = 5000
+    test_data = [None] * count  # 预分配
+    now = time.time()
+    now_ms = int(now * 1000)
+    for i in range(count):
+        test_data[i] = {
+            'localtime': now + i * 1e-6,
             'stream': 'btcusdt@depth@0ms',
             'data': {
                 'e': 'depthUpdate',
-                'E': int(time.time() * 1000),
-                'T': int(time.time() * 1000),
+                'E': now_ms + i,
+                'T': now_ms + i,
                 's': 'BTCUSDT',
                 'U': i,
                 'u': i + 1,
@@ -39,13 +47,14 @@ def profile_file_writer():
                 'b': [['100.0', '1.0'], ['99.0', '2.0']],
                 'a': [['101.0', '1.0'], ['102.0', '2.0']]
             }
-        })
+        }
     
     profiler = cProfile.Profile()
     profiler.enable()
     
     try:
-        _flush_depth_batch('TESTBTC', test_data)
+        with redirect_output_to_test_root():
+            _flush_depth_batch('TESTBTC', test_data)
     except Exception as e:
         print(f"文件写入测试失败: {e}")
     
@@ -99,14 +108,16 @@ def profile_websocket_data_processing():
     import time
     
     # 模拟WebSocket消息
-    sample_messages = []
-    for i in range(3000):
+    count = 3000
+    sample_messages = [None] * count  # 预分配
+    now_ms = int(time.time() * 1000)
+    for i in range(count):
         msg = {
             'stream': 'btcusdt@depth@0ms',
             'data': {
                 'e': 'depthUpdate',
-                'E': int(time.time() * 1000),
-                'T': int(time.time() * 1000),
+                'E': now_ms + i,
+                'T': now_ms + i,
                 's': 'BTCUSDT',
                 'U': i,
                 'u': i + 1,
@@ -115,7 +126,7 @@ def profile_websocket_data_processing():
                 'a': [['101.0', '1.0'], ['102.0', '2.0']]
             }
         }
-        sample_messages.append(json.dumps(msg))
+        sample_messages[i] = json.dumps(msg)
     
     profiler = cProfile.Profile()
     profiler.enable()
@@ -134,6 +145,15 @@ def profile_websocket_data_processing():
     profiler.disable()
     return profiler
 
+def run_profile(task):
+    """在子进程中运行一个分析任务，cProfile.Profile不可pickle，统计结果写入临时文件后返回路径"""
+    component_name, profile_func = task
+    profiler = profile_func()
+    fd, stats_file = tempfile.mkstemp(suffix='.prof')
+    os.close(fd)
+    pstats.Stats(profiler).dump_stats(stats_file)
+    return component_name, stats_file
+
 def analyze_profiler_results(profiler, component_name):
     """分析profiler结果"""
     print(f"\n=== {component_name} 性能分析 ===")
@@ -147,6 +167,14 @@ def analyze_profiler_results(profiler, component_name):
     
     return stats
 
+# 性能瓶颈类别 -> 函数名关键字
+PERFORMANCE_CATEGORIES = {
+    'io': ['write', 'read', 'open', 'close', 'flush'],
+    'data': ['json', 'pandas', 'dataframe', 'to_csv', 'loads', 'dumps'],
+    'struct': ['sort', 'sorted', '__setitem__', '__getitem__', 'update'],
+    'network': ['websocket', 'connect', 'recv', 'send'],
+}
+
 def generate_comprehensive_report(all_stats):
     """生成综合性能报告"""
     report_file = 'performance_analysis_report.txt'
@@ -155,13 +183,15 @@ def generate_comprehensive_report(all_stats):
         f.write("=== Binance Streamer 性能分析报告 ===\n\n")
         f.write(f"分析时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
-        # 合并所有统计数据
-        combined_stats = all_stats[0]
-        for stats in all_stats[1:]:
-            combined_stats.add(stats)
-        
-        # 获取统计数据
-        stats_dict = combined_stats.stats
+        # 合并所有统计数据：一次遍历累加各函数的(cc, nc, tt, ct)
+        stats_dict = {}
+        for stats in all_stats:
+            for func, value in stats.stats.items():
+                current = stats_dict.get(func)
+                if current is None:
+                    stats_dict[func] = value
+                else:
+                    stats_dict[func] = tuple(a + b for a, b in zip(current[:4], value[:4])) + (current[4],)
         
         f.write("=== 整体性能热点函数 (按累计时间) ===\n")
         hot_functions = []
@@ -184,23 +214,20 @@ def generate_comprehensive_report(all_stats):
         # 分析性能瓶颈类型
         f.write("=== 性能瓶颈分析 ===\n")
         
-        # I/O操作时间
-        io_time = sum(ct for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items()
-                     if any(keyword in func_name.lower() for keyword in ['write', 'read', 'open', 'close', 'flush']))
-        
-        # 数据处理时间
-        data_time = sum(ct for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items()
-                       if any(keyword in func_name.lower() for keyword in ['json', 'pandas', 'dataframe', 'to_csv', 'loads', 'dumps']))
-        
-        # 排序和数据结构操作时间
-        struct_time = sum(ct for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items()
-                         if any(keyword in func_name.lower() for keyword in ['sort', 'sorted', '__setitem__', '__getitem__', 'update']))
-        
-        # 网络相关时间
-        network_time = sum(ct for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items()
-                          if any(keyword in func_name.lower() for keyword in ['websocket', 'connect', 'recv', 'send']))
-        
-        total_time = sum(ct for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items())
+        # 一次遍历按函数名归类（命中第一个匹配的类别）
+        category_time = dict.fromkeys(PERFORMANCE_CATEGORIES, 0.0)
+        total_time = 0.0
+        for (fname, line, func_name), (cc, nc, tt, ct, callers) in stats_dict.items():
+            total_time += ct
+            name = func_name.lower()
+            for category, keywords in PERFORMANCE_CATEGORIES.items():
+                if any(keyword in name for keyword in keywords):
+                    category_time[category] += ct
+                    break
+        io_time = category_time['io']
+        data_time = category_time['data']
+        struct_time = category_time['struct']
+        network_time = category_time['network']
         
         f.write(f"总执行时间: {total_time:.4f}s\n")
         f.write(f"I/O操作时间: {io_time:.4f}s ({io_time/total_time*100:.1f}%)\n")
@@ -250,22 +277,21 @@ def generate_comprehensive_report(all_stats):
 def main():
     print("开始Binance Streamer性能分析...")
     
-    all_stats = []
-    
-    # 1. 分析文件写入性能
-    profiler1 = profile_file_writer()
-    stats1 = analyze_profiler_results(profiler1, "文件写入")
-    all_stats.append(stats1)
-    
-    # 2. 分析订单簿操作性能
-    profiler2 = profile_orderbook_operations()
-    stats2 = analyze_profiler_results(profiler2, "订单簿操作")
-    all_stats.append(stats2)
+    # 三项分析互不依赖，各占一个进程并行运行
+    tasks = [
+        ("文件写入", profile_file_writer),
+        ("订单簿操作", profile_orderbook_operations),
+        ("WebSocket数据处理", profile_websocket_data_processing),
+    ]
+    with multiprocessing.Pool(len(tasks)) as pool:
+        results = pool.map(run_profile, tasks)
     
-    # 3. 分析WebSocket数据处理性能
-    profiler3 = profile_websocket_data_processing()
-    stats3 = analyze_profiler_results(profiler3, "WebSocket数据处理")
-    all_stats.append(stats3)
+    all_stats = []
+    for component_name, stats_file in results:
+        try:
+            all_stats.append(analyze_profiler_results(stats_file, component_name))
+        finally:
+            os.remove(stats_file)
     
     # 生成综合报告
     report_file = generate_comprehensive_report(all_stats)
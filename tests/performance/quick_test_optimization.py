@@ -16,41 +16,48 @@ from src.binance_streamer.file_writer import (
     _flush_aggtrade_batch, 
     _flush_depth_batch,
     _flush_aggtrade_batch_optimized,
-    _flush_depth_batch_optimized
+    _flush_depth_batch_optimized,
+    get_daily_filename
 )
+from tests.test_utils import redirect_output_to_test_root
 
 def create_test_data():
     """创建测试数据"""
-    aggtrade_data = []
-    depth_data = []
-    
-    for i in range(1000):
+    count = 1000
+    # 按记录数预分配列表，逐个下标赋值
+    aggtrade_data = [None] * count
+    depth_data = [None] * count
+    # 时间戳在循环外取一次，逐条递增
+    now = time.time()
+    now_ms = int(now * 1000)
+    
+    for i in range(count):
         # aggtrade测试数据
-        aggtrade_data.append({
-            'localtime': time.time() + i * 0.001,
+        aggtrade_data[i] = {
+            'localtime': now + i * 0.001,
             'stream': 'btcusdt@aggTrade',
             'data': {
                 'e': 'aggTrade',
-                'E': int(time.time() * 1000) + i,
+                'E': now_ms + i,
                 'a': 123456 + i,
                 's': 'BTCUSDT',
                 'p': f'{50000 + i * 0.1:.2f}',
                 'q': f'{0.001 + i * 0.0001:.4f}',
                 'f': 100 + i,
                 'l': 200 + i,
-                'T': int(time.time() * 1000) + i,
+                'T': now_ms + i,
                 'm': i % 2 == 0
             }
-        })
+        }
         
         # depth测试数据
-        depth_data.append({
-            'localtime': time.time() + i * 0.001,
+        depth_data[i] = {
+            'localtime': now + i * 0.001,
             'stream': 'btcusdt@depth@0ms',
             'data': {
                 'e': 'depthUpdate',
-                'E': int(time.time() * 1000) + i,
-                'T': int(time.time() * 1000) + i,
+                'E': now_ms + i,
+                'T': now_ms + i,
                 's': 'BTCUSDT',
                 'U': 123456 + i,
                 'u': 123457 + i,
@@ -64,7 +71,7 @@ def create_test_data():
                     for j in range(5)
                 ]
             }
-        })
+        }
     
     return aggtrade_data, depth_data
 
@@ -79,10 +86,12 @@ def test_pandas_vs_optimized():
     profiler_pandas = cProfile.Profile()
     profiler_pandas.enable()
     
-    start_pandas = time.time()
-    _flush_aggtrade_batch('TESTPANDAS', aggtrade_data)
-    _flush_depth_batch('TESTPANDAS', depth_data)
-    pandas_time = time.time() - start_pandas
+    # 两个版本的输出都写到TEST_ROOT
+    with redirect_output_to_test_root():
+        start_pandas = time.perf_counter()
+        _flush_aggtrade_batch('TESTPANDAS', aggtrade_data)
+        _flush_depth_batch('TESTPANDAS', depth_data)
+        pandas_time = time.perf_counter() - start_pandas
     
     profiler_pandas.disable()
     
@@ -91,10 +100,11 @@ def test_pandas_vs_optimized():
     profiler_optimized = cProfile.Profile()
     profiler_optimized.enable()
     
-    start_optimized = time.time()
-    _flush_aggtrade_batch_optimized('TESTOPTIMIZED', aggtrade_data)
-    _flush_depth_batch_optimized('TESTOPTIMIZED', depth_data)
-    optimized_time = time.time() - start_optimized
+    with redirect_output_to_test_root():
+        start_optimized = time.perf_counter()
+        _flush_aggtrade_batch_optimized('TESTOPTIMIZED', aggtrade_data)
+        _flush_depth_batch_optimized('TESTOPTIMIZED', depth_data)
+        optimized_time = time.perf_counter() - start_optimized
     
     profiler_optimized.disable()
     
@@ -119,8 +129,9 @@ def verify_data_integrity():
     
     # 读取pandas版本生成的文件
     try:
-        pandas_aggtrade = pd.read_csv('./data/TESTPANDAS/aggtrade_TESTPANDAS_20250831.csv')
-        pandas_depth = pd.read_csv('./data/TESTPANDAS/depth_TESTPANDAS_20250831.csv')
+        with redirect_output_to_test_root():
+            pandas_aggtrade = pd.read_csv(get_daily_filename('aggtrade', 'TESTPANDAS'))
+            pandas_depth = pd.read_csv(get_daily_filename('depth', 'TESTPANDAS'))
         
         print(f"pandas aggtrade记录数: {len(pandas_aggtrade)}")
         print(f"pandas depth记录数:    {len(pandas_depth)}")
@@ -131,8 +142,9 @@ def verify_data_integrity():
     
     # 读取优化版本生成的文件
     try:
-        optimized_aggtrade = pd.read_csv('./data/TESTOPTIMIZED/aggtrade_TESTOPTIMIZED_20250831.csv')
-        optimized_depth = pd.read_csv('./data/TESTOPTIMIZED/depth_TESTOPTIMIZED_20250831.csv')
+        with redirect_output_to_test_root():
+            optimized_aggtrade = pd.read_csv(get_daily_filename('aggtrade', 'TESTOPTIMIZED'))
+            optimized_depth = pd.read_csv(get_daily_filename('depth', 'TESTOPTIMIZED'))
         
         print(f"优化版 aggtrade记录数: {len(optimized_aggtrade)}")
         print(f"优化版 depth记录数:    {len(optimized_depth)}")
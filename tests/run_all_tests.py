@@ -4,8 +4,14 @@
 提供了完整的测试套件执行和结果汇总
 """
 import os
+import io
+import ast
 import sys
 import time
+import runpy
+import threading
+import traceback
+import contextlib
 import subprocess
 from typing import Dict, List, Tuple
 
@@ -13,19 +19,94 @@ from typing import Dict, List, Tuple
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+def needs_isolation(test_path: str) -> bool:
+    """测试脚本顶层设置 _ISOLATE = True 时在独立子进程中运行（例如使用多进程或修改全局事件循环的测试）"""
+    with open(os.path.join(project_root, test_path), encoding='utf-8') as f:
+        tree = ast.parse(f.read(), test_path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == '_ISOLATE' for target in node.targets):
+            try:
+                return bool(ast.literal_eval(node.value))
+            except ValueError:
+                return False
+    return False
+
 class TestRunner:
     """测试运行器"""
     
     def __init__(self):
         self.results = []
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
     
     def run_test(self, test_path: str, test_name: str, timeout: int = 60) -> Tuple[bool, str, float]:
-        """运行单个测试"""
+        """运行单个测试，默认在当前进程中执行，需要隔离的测试使用子进程"""
         print(f"\n🧪 运行测试: {test_name}")
         print(f"   路径: {test_path}")
         
-        start = time.time()
+        if needs_isolation(test_path):
+            return self._run_test_subprocess(test_path, timeout)
+        return self._run_test_in_process(test_path, timeout)
+    
+    def _run_test_in_process(self, test_path: str, timeout: int) -> Tuple[bool, str, float]:
+        """
+        以__main__身份在当前解释器中执行测试脚本，省去解释器启动并复用已导入的模块
+        
+        脚本在守护线程中运行，主线程最多等待timeout秒；超时的线程无法强制结束，
+        只能放弃等待并继续后续测试（需要可靠终止的测试应设置 _ISOLATE = True）。
+        """
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_cwd, saved_argv = os.getcwd(), sys.argv
+        outcome = {}
+        
+        def run():
+            try:
+                runpy.run_path(test_path, run_name='__main__')
+                outcome['exit_code'] = 0
+            except SystemExit as e:
+                outcome['exit_code'] = e.code
+            except BaseException:
+                outcome['error'] = traceback.format_exc()
+        
+        worker = threading.Thread(target=run, name=f'test-{test_path}', daemon=True)
+        start = time.perf_counter()
+        try:
+            os.chdir(project_root)
+            sys.argv = [test_path]
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                worker.start()
+                worker.join(timeout)
+        finally:
+            os.chdir(saved_cwd)
+            sys.argv = saved_argv
+        duration = time.perf_counter() - start
+        
+        if worker.is_alive():
+            # 线程仍可能在写文件，不关闭缓存的文件描述符
+            print(f"   ⏰ 超时 ({timeout}s)")
+            return False, f"测试超时 ({timeout}s)", duration
+        
+        # 关闭测试期间缓存的数据文件，后续测试可能清理或重建同名文件
+        file_writer = sys.modules.get('src.binance_streamer.file_writer')
+        if file_writer is not None:
+            file_writer.close_cached_writers()
+        
+        if 'error' in outcome:
+            success, output = False, stderr.getvalue() + outcome['error']
+        else:
+            success = outcome['exit_code'] in (None, 0)
+            output = stdout.getvalue() if success else (stderr.getvalue() or f"退出码: {outcome['exit_code']}")
+        
+        if success:
+            print(f"   ✅ 通过 ({duration:.2f}s)")
+        else:
+            print(f"   ❌ 失败 ({duration:.2f}s)")
+            print(f"   错误: {output[-200:]}...")
+        return success, output, duration
+    
+    def _run_test_subprocess(self, test_path: str, timeout: int) -> Tuple[bool, str, float]:
+        """在独立的Python进程中运行测试"""
+        start = time.perf_counter()
         try:
             result = subprocess.run(
                 [sys.executable, test_path],
@@ -34,7 +115,7 @@ class TestRunner:
                 timeout=timeout,
                 cwd=project_root
             )
-            duration = time.time() - start
+            duration = time.perf_counter() - start
             
             if result.returncode == 0:
                 print(f"   ✅ 通过 ({duration:.2f}s)")
@@ -45,11 +126,11 @@ class TestRunner:
                 return False, result.stderr, duration
                 
         except subprocess.TimeoutExpired:
-            duration = time.time() - start
+            duration = time.perf_counter() - start
             print(f"   ⏰ 超时 ({timeout}s)")
             return False, f"测试超时 ({timeout}s)", duration
         except Exception as e:
-            duration = time.time() - start
+            duration = time.perf_counter() - start
             print(f"   💥 异常: {e}")
             return False, str(e), duration
     
@@ -80,7 +161,9 @@ class TestRunner:
         print("="*50)
         
         unit_tests = [
-            ("tests/unit/test_optimized_write.py", "优化写入功能测试")
+            ("tests/unit/test_optimized_write.py", "优化写入功能测试"),
+            ("tests/unit/test_batch_format.py", "批次格式一致性测试"),
+            ("tests/unit/test_uring.py", "io_uring写入引擎测试")
         ]
         
         unit_results = []
@@ -111,7 +194,7 @@ class TestRunner:
     
     def generate_summary_report(self):
         """生成测试总结报告"""
-        total_duration = time.time() - self.start_time
+        total_duration = time.perf_counter() - self.start_time
         
         print("\n" + "="*60)
         print("📊 测试结果总结")
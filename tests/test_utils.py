@@ -3,165 +3,310 @@
 提供测试过程中常用的工具函数和数据生成器
 """
 import time
+import atexit
+import glob
 import json
+import logging
+import mmap
 import os
 import shutil
-from typing import List, Dict, Any
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple
 
-def create_mock_aggtrade_data(symbol: str, count: int = 100) -> List[Dict]:
-    """创建模拟的aggtrade数据"""
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，缺失时使用标准库json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _resolve_test_root() -> str:
+    """测试输出根目录：优先使用BINANCE_STREAMER_TEST_ROOT，否则在/dev/shm（tmpfs）下创建临时目录"""
+    root = os.environ.get('BINANCE_STREAMER_TEST_ROOT')
+    if root:
+        os.makedirs(root, exist_ok=True)
+        return root
+    
+    # tmpfs只经过页缓存，测试写入不受块设备I/O影响；自动创建的目录在进程退出时删除
+    root = tempfile.mkdtemp(prefix='bs_', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    atexit.register(shutil.rmtree, root, True)
+    return root
+
+TEST_ROOT = _resolve_test_root()
+
+@contextmanager
+def redirect_output_to_test_root():
+    """在上下文内将写入函数的输出目录（storage.output_directory）切换到TEST_ROOT，退出时恢复"""
+    from src.binance_streamer.config import config_manager
+    
+    previous = config_manager.set_output_directory(TEST_ROOT)
+    try:
+        yield TEST_ROOT
+    finally:
+        config_manager.set_output_directory(previous)
+
+def _format_fixed(values: np.ndarray, decimals: int) -> List[str]:
+    """将一列数值格式化为固定小数位字符串，结果与 f'{value:.{decimals}f}' 相同（np.char.mod更慢）"""
+    return list(map(f'{{:.{decimals}f}}'.format, values.tolist()))
+
+def create_mock_aggtrade_columns(count: int = 100) -> Dict[str, np.ndarray]:
+    """
+    创建列式（SoA）的模拟aggtrade数据，每个字段一个NumPy数组
+    
+    价格和数量为float64，格式化为字符串由create_mock_aggtrade_data完成；
+    e/s/stream 各行相同且只取决于交易对，不生成数组（由create_mock_aggtrade_data填入）。
+    """
     base_time = time.time()
+    base_ms = int(base_time * 1000)
     base_price = 50000.0
     
-    data = []
-    for i in range(count):
-        record = {
-            'localtime': base_time + i * 0.001,
-            'stream': f'{symbol.lower()}@aggTrade',
+    idx = np.arange(count, dtype=np.int64)
+    event_times = base_ms + idx
+    return {
+        'localtime': base_time + idx * 0.001,
+        'E': event_times,
+        'a': 123456 + idx,
+        'p': base_price + idx * 0.1,
+        'q': 0.001 + idx * 0.0001,
+        'f': 100 + idx,
+        'l': 200 + idx,
+        'T': event_times.copy(),
+        'm': idx % 2 == 0,
+    }
+
+def create_mock_aggtrade_data(symbol: str, count: int = 100) -> List[Dict]:
+    """创建模拟的aggtrade数据（由列式数据逐行组装）"""
+    columns = create_mock_aggtrade_columns(count)
+    stream = f'{symbol.lower()}@aggTrade'
+    
+    return [
+        {
+            'localtime': localtime,
+            'stream': stream,
             'data': {
                 'e': 'aggTrade',
-                'E': int(base_time * 1000) + i,
-                'a': 123456 + i,
+                'E': E,
+                'a': a,
                 's': symbol,
-                'p': f'{base_price + i * 0.1:.2f}',
-                'q': f'{0.001 + i * 0.0001:.4f}',
-                'f': 100 + i,
-                'l': 200 + i,
-                'T': int(base_time * 1000) + i,
-                'm': i % 2 == 0
+                'p': p,
+                'q': q,
+                'f': f,
+                'l': l,
+                'T': T,
+                'm': m
             }
         }
-        data.append(record)
-    
-    return data
+        for localtime, E, a, p, q, f, l, T, m in zip(
+            columns['localtime'].tolist(), columns['E'].tolist(), columns['a'].tolist(),
+            _format_fixed(columns['p'], 2), _format_fixed(columns['q'], 4),
+            columns['f'].tolist(), columns['l'].tolist(), columns['T'].tolist(), columns['m'].tolist())
+    ]
 
 def create_mock_depth_data(symbol: str, count: int = 100) -> List[Dict]:
     """创建模拟的depth数据"""
     base_time = time.time()
+    base_ms = int(base_time * 1000)
+    stream = f'{symbol.lower()}@depth@0ms'
+    
+    # 各条记录的5档买卖盘相同，只生成一次（所有记录共享同一列表）
+    bids = [[f'{50000 - j * 0.1:.1f}', f'{j + 1}.0'] for j in range(5)]
+    asks = [[f'{50000 + j * 0.1:.1f}', f'{j + 1}.0'] for j in range(5)]
+    
+    idx = np.arange(count)
+    localtimes = (base_time + idx * 0.001).tolist()
+    event_times = (base_ms + idx).tolist()
     
-    data = []
-    for i in range(count):
-        record = {
-            'localtime': base_time + i * 0.001,
-            'stream': f'{symbol.lower()}@depth@0ms',
+    return [
+        {
+            'localtime': localtime,
+            'stream': stream,
             'data': {
                 'e': 'depthUpdate',
-                'E': int(base_time * 1000) + i,
-                'T': int(base_time * 1000) + i,
+                'E': event_time,
+                'T': event_time,
                 's': symbol,
                 'U': 123456 + i,
                 'u': 123457 + i,
                 'pu': 123455 + i,
-                'b': [
-                    [f'{50000 - j * 0.1:.1f}', f'{j + 1}.0'] 
-                    for j in range(5)
-                ],
-                'a': [
-                    [f'{50000 + j * 0.1:.1f}', f'{j + 1}.0'] 
-                    for j in range(5)
-                ]
+                'b': bids,
+                'a': asks
             }
         }
-        data.append(record)
+        for i, localtime, event_time in zip(range(count), localtimes, event_times)
+    ]
+
+def _mock_kline_columns(count: int) -> List[List]:
+    """按列生成模拟kline的变化字段: localtime, E, t, T, f/L/n序号, o, c, h, l, v, q, V, Q"""
+    base_time = time.time()
+    base_ms = int(base_time * 1000)
     
-    return data
+    idx = np.arange(count)
+    return [
+        (base_time + idx * 0.001).tolist(),
+        (base_ms + idx).tolist(),
+        (base_ms + idx * 60000).tolist(),
+        (base_ms + (idx + 1) * 60000).tolist(),
+        list(range(count)),
+        _format_fixed(50000 + idx * 0.1, 2),
+        _format_fixed(50000 + (idx + 1) * 0.1, 2),
+        _format_fixed(50000 + (idx + 2) * 0.1, 2),
+        _format_fixed(50000 + (idx - 1) * 0.1, 2),
+        _format_fixed(10.0 + idx * 0.1, 1),
+        _format_fixed(500000.0 + idx * 100, 1),
+        _format_fixed(5.0 + idx * 0.05, 2),
+        _format_fixed(250000.0 + idx * 50, 1),
+    ]
 
 def create_mock_kline_data(symbol: str, count: int = 50) -> List[Dict]:
     """创建模拟的kline数据"""
-    base_time = time.time()
+    stream = f'{symbol.lower()}@kline_1m'
     
-    data = []
-    for i in range(count):
-        record = {
-            'localtime': base_time + i * 0.001,
-            'stream': f'{symbol.lower()}@kline_1m',
+    return [
+        {
+            'localtime': localtime,
+            'stream': stream,
             'data': {
                 'e': 'kline',
-                'E': int(base_time * 1000) + i,
+                'E': event_time,
                 'k': {
                     's': symbol,
-                    't': int(base_time * 1000) + i * 60000,
-                    'T': int(base_time * 1000) + (i + 1) * 60000,
+                    't': open_time,
+                    'T': close_time,
                     'i': '1m',
                     'f': 100 + i,
                     'L': 200 + i,
-                    'o': f'{50000 + i * 0.1:.2f}',
-                    'c': f'{50000 + (i + 1) * 0.1:.2f}',
-                    'h': f'{50000 + (i + 2) * 0.1:.2f}',
-                    'l': f'{50000 + (i - 1) * 0.1:.2f}',
-                    'v': f'{10.0 + i * 0.1:.1f}',
+                    'o': o,
+                    'c': c,
+                    'h': h,
+                    'l': l,
+                    'v': v,
                     'n': 100 + i,
                     'x': True,
-                    'q': f'{500000.0 + i * 100:.1f}',
-                    'V': f'{5.0 + i * 0.05:.2f}',
-                    'Q': f'{250000.0 + i * 50:.1f}',
+                    'q': q,
+                    'V': V,
+                    'Q': Q,
                     'B': '0'
                 }
             }
         }
-        data.append(record)
-    
-    return data
+        for localtime, event_time, open_time, close_time, i, o, c, h, l, v, q, V, Q
+        in zip(*_mock_kline_columns(count))
+    ]
 
+if orjson is not None:
+    _dumps_line = orjson.dumps
+else:
+    def _dumps_line(obj: Any) -> bytes:
+        """紧凑JSON序列化，与orjson输出格式一致"""
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def records_to_jsonl(records: List[Dict]) -> bytes:
+    """将模拟消息序列化为JSON Lines字节串，安装orjson时使用orjson"""
+    return b'\n'.join([_dumps_line(record) for record in records])
+
+def _safe_rmtree(path: str) -> bool:
+    """删除目录树，返回是否删除成功（ignore_errors下缺失目录不报错，删除后仍存在才视为失败）"""
+    shutil.rmtree(path, ignore_errors=True)
+    if os.path.lexists(path):
+        logger.warning("⚠️  清理失败: %s", path)
+        return False
+    return True
+
+# 仍直接写入默认输出目录的测试脚本（性能测试、集成测试）生成的数据位于此处
 def cleanup_test_data():
-    """清理测试数据"""
-    test_dirs = [
-        './data/TESTBTC',
-        './data/TESTBTC2', 
-        './data/TESTOPT',
-        './data/TESTPANDAS',
-        './data/TESTOPTIMIZED',
-        './data/LIVETEST'
-    ]
+    """清理TEST_ROOT下的测试数据目录（TEST*、LIVETEST等名称中含TEST的目录），不触及./data等实际输出目录"""
+    test_dirs = glob.glob(os.path.join(TEST_ROOT, '*TEST*'))
+    if not test_dirs:
+        logger.info("✅ 清理了 0 个测试目录")
+        return
     
+    # 各目录的删除互不依赖，在线程中并行执行，unlink/rmdir系统调用期间释放GIL
+    # 目录在glob之后被其他进程删除也不报错（rmtree忽略错误），不再预先stat
     cleaned_count = 0
-    for test_dir in test_dirs:
-        if os.path.exists(test_dir):
-            try:
-                shutil.rmtree(test_dir)
+    with ThreadPoolExecutor(max_workers=len(test_dirs)) as executor:
+        for test_dir, removed in zip(test_dirs, executor.map(_safe_rmtree, test_dirs)):
+            if removed:
                 cleaned_count += 1
-                print(f"🗑️  清理测试目录: {test_dir}")
-            except Exception as e:
-                print(f"⚠️  清理失败 {test_dir}: {e}")
+                logger.info("🗑️  清理测试目录: %s", test_dir)
     
-    print(f"✅ 清理了 {cleaned_count} 个测试目录")
+    logger.info("✅ 清理了 %d 个测试目录", cleaned_count)
+
+_HEADER_PAGE = 4096
 
 def verify_file_format(filepath: str, expected_fields: List[str]) -> bool:
-    """验证CSV文件格式"""
-    if not os.path.exists(filepath):
-        return False
-    
+    """验证CSV文件格式（常用字段可直接使用*_EXPECTED_HEADER_BYTES调用verify_file_header_bytes）"""
+    return verify_file_header_bytes(filepath, ','.join(expected_fields).encode('utf-8'))
+
+def verify_file_header_bytes(filepath: str, expected_header: bytes) -> bool:
+    """验证CSV文件头部行与expected_header（不含换行符）一致，文件不存在时返回False"""
     try:
-        with open(filepath, 'r') as f:
-            header = f.readline().strip()
-            actual_fields = header.split(',')
-            return actual_fields == expected_fields
+        # 只映射首页，在原始字节上直接比较头部行
+        with open(filepath, 'rb') as f:
+            length = min(_HEADER_PAGE, os.fstat(f.fileno()).st_size)
+            if length == 0:
+                return False
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mm:
+                end = mm.find(b'\n')
+                header = mm[:end] if end >= 0 else mm[:]
+        return header.rstrip(b'\r') == expected_header
     except Exception:
         return False
 
+def _count_newlines(mm: mmap.mmap) -> int:
+    """直接在映射的原始字节上统计换行符，不逐行解码（mmap没有count方法，用find逐个查找，不复制数据）"""
+    count = 0
+    position = mm.find(b'\n')
+    while position != -1:
+        count += 1
+        position = mm.find(b'\n', position + 1)
+    return count
+
 def count_records_in_file(filepath: str) -> int:
-    """计算文件中的记录数"""
-    if not os.path.exists(filepath):
+    """计算文件中的记录数，文件不存在时返回0"""
+    try:
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:  # 空文件无法mmap
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                newlines = _count_newlines(mm)
+        return max(0, newlines - 1)  # 减去头部行
+    except Exception:  # 包括FileNotFoundError
         return 0
+
+def inspect_csv(filepath: str, expected_header: bytes) -> Tuple[bool, int]:
+    """
+    一次映射同时完成头部检查和记录计数，返回(头部是否一致, 记录数)
     
+    回读写入结果时代替分别调用verify_file_header_bytes和count_records_in_file，
+    文件只打开、映射一次。文件不存在或为空时返回(False, 0)。
+    """
     try:
-        with open(filepath, 'r') as f:
-            return sum(1 for _ in f) - 1  # 减去头部行
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False, 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.find(b'\n')
+                header = mm[:end] if end >= 0 else mm[:]
+                newlines = _count_newlines(mm)
+        return header.rstrip(b'\r') == expected_header, max(0, newlines - 1)
     except Exception:
-        return 0
+        return False, 0
 
-def benchmark_function(func, *args, **kwargs) -> Tuple[Any, float]:
-    """对函数进行基准测试"""
-    start = time.time()
+def benchmark_function(func, *args, **kwargs) -> Tuple[Any, int]:
+    """对函数进行基准测试，返回(结果, 耗时纳秒)"""
+    start = time.perf_counter_ns()
     result = func(*args, **kwargs)
-    duration = time.time() - start
-    return result, duration
+    return result, time.perf_counter_ns() - start
 
-def print_performance_summary(results: Dict[str, float]):
-    """打印性能总结"""
+def print_performance_summary(results: Dict[str, int]):
+    """打印性能总结（耗时单位为纳秒）"""
     print("\n📊 性能总结:")
-    for test_name, duration in results.items():
-        print(f"  {test_name:30s}: {duration:.4f}s")
+    for test_name, duration_ns in results.items():
+        print(f"  {test_name:30s}: {duration_ns / 1e9:.4f}s")
 
 # 预定义的测试数据集大小
 SMALL_DATASET = 100    # 快速测试
@@ -182,4 +327,9 @@ KLINE_EXPECTED_FIELDS = [
     'localtime', 'stream', 'event_type', 'event_time',
     's', 'k_t', 'k_T', 'k_s', 'k_i', 'k_f', 'k_L', 'k_o', 'k_c', 'k_h', 'k_l',
     'k_v', 'k_n', 'k_x', 'k_q', 'k_V', 'k_Q', 'k_B'
-]
\ No newline at end of file
+]
+
+# 预先编码的头部行，配合verify_file_header_bytes使用
+AGGTRADE_EXPECTED_HEADER_BYTES = ','.join(AGGTRADE_EXPECTED_FIELDS).encode('ascii')
+DEPTH_EXPECTED_HEADER_BYTES = ','.join(DEPTH_EXPECTED_FIELDS).encode('ascii')
+KLINE_EXPECTED_HEADER_BYTES = ','.join(KLINE_EXPECTED_FIELDS).encode('ascii')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+测试大小批次写入同一文件时行格式一致
+（≥_ARROW_THRESHOLD行的批次由pyarrow序列化，较小批次使用csv模块）
+"""
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.binance_streamer import file_writer
+from src.binance_streamer.file_writer import (
+    _flush_aggtrade_batch_optimized,
+    _flush_kline_batch_optimized,
+    _target_file,
+    AGGTRADE_FIELDS,
+    KLINE_FIELDS
+)
+from tests.test_utils import redirect_output_to_test_root
+
+def _check_batches(flush, prefix: str, fields, template: dict) -> bool:
+    """先写_ARROW_THRESHOLD-1行再写_ARROW_THRESHOLD行，两个批次的行应逐字节相同"""
+    symbol = f'TESTFMT{prefix.upper().replace("_", "")}'
+    small = file_writer._ARROW_THRESHOLD - 1
+    large = file_writer._ARROW_THRESHOLD
+
+    flush(symbol, [template] * small)
+    flush(symbol, [template] * large)
+    file_writer.close_cached_writers()
+
+    filename, _ = _target_file(prefix, symbol, fields)
+    with open(filename, 'rb') as f:
+        lines = f.read().split(b'\r\n')
+
+    # 头部 + 两个批次，文件以\r\n结尾，最后一项为空
+    rows = lines[1:-1]
+    if lines[-1] != b'' or len(rows) != small + large:
+        print(f"❌ {prefix}: 行数 {len(rows)}，预期 {small + large}（或行尾不是\\r\\n）")
+        return False
+    if len(set(rows)) != 1:
+        print(f"❌ {prefix}: 小批次行 {rows[0]!r} 与大批次行 {rows[-1]!r} 不一致")
+        return False
+
+    print(f"✅ {prefix}: {small}行与{large}行批次格式一致: {rows[0][:60]!r}...")
+    return True
+
+def test_batch_format_consistency() -> bool:
+    """aggtrade/kline的csv模块与pyarrow输出一致"""
+    print("=== 测试大小批次行格式一致 ===")
+    if file_writer.pa is None:
+        print("⏭️  未安装pyarrow，所有批次均使用csv模块，跳过")
+        return True
+
+    now = time.time()
+    now_ms = int(now * 1000)
+    aggtrade_template = {
+        'localtime': now,
+        'stream': 'btcusdt@aggTrade',
+        'data': {
+            'e': 'aggTrade', 'E': now_ms, 'a': 123456, 's': 'BTCUSDT',
+            'p': '50000.00', 'q': '0.001', 'f': 100, 'l': 105, 'T': now_ms, 'm': True
+        }
+    }
+    kline_template = {
+        'localtime': now,
+        'stream': 'btcusdt@kline_1m',
+        'data': {
+            'e': 'kline', 'E': now_ms, 's': 'BTCUSDT',
+            'k': {
+                't': now_ms, 'T': now_ms + 60000, 's': 'BTCUSDT', 'i': '1m',
+                'f': 100, 'L': 200, 'o': '50000.0', 'c': '50100.0', 'h': '50200.0',
+                'l': '49900.0', 'v': '10.0', 'n': 100, 'x': False, 'q': '500000.0',
+                'V': '5.0', 'Q': '250000.0', 'B': '0'
+            }
+        }
+    }
+
+    with redirect_output_to_test_root():
+        results = [
+            _check_batches(_flush_aggtrade_batch_optimized, 'aggtrade', AGGTRADE_FIELDS, aggtrade_template),
+            _check_batches(_flush_kline_batch_optimized, 'kline_1m', KLINE_FIELDS, kline_template),
+        ]
+    return all(results)
+
+if __name__ == '__main__':
+    if test_batch_format_consistency():
+        print("🎉 批次格式一致性测试通过！")
+    else:
+        print("❌ 批次格式一致性测试失败！")
+        sys.exit(1)
@@ -5,47 +5,67 @@
 import os
 import sys
 import time
+import logging
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目根目录到路径
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
+from src.binance_streamer import file_writer
 from src.binance_streamer.file_writer import (
     _flush_aggtrade_batch_optimized, 
     _flush_depth_batch_optimized,
-    _flush_kline_batch_optimized
+    _flush_kline_batch_optimized,
+    _target_file,
+    AGGTRADE_FIELDS,
+    DEPTH_FIELDS,
+    KLINE_FIELDS
 )
+from tests.test_utils import (
+    redirect_output_to_test_root,
+    count_records_in_file,
+    inspect_csv,
+    AGGTRADE_EXPECTED_HEADER_BYTES,
+    DEPTH_EXPECTED_HEADER_BYTES,
+    KLINE_EXPECTED_HEADER_BYTES
+)
+
+logger = logging.getLogger(__name__)
 
 def test_optimized_functions():
     """测试优化版写入函数"""
-    print("=== 测试优化版写入函数 ===")
+    logger.info("=== 测试优化版写入函数 ===")
     
-    # 创建测试数据
-    test_aggtrade = [{
-        'localtime': time.time(),
+    # 创建测试数据：同类记录内容相同，每类只构造一条模板，批次中共享引用（写入函数只读取记录）
+    # 三类模板共用同一个时间基准
+    now = time.time()
+    now_ms = int(now * 1000)
+    aggtrade_template = {
+        'localtime': now,
         'stream': 'btcusdt@aggTrade',
         'data': {
             'e': 'aggTrade',
-            'E': int(time.time() * 1000),
+            'E': now_ms,
             'a': 123456,
             's': 'BTCUSDT',
             'p': '50000.0',
             'q': '0.001',
             'f': 100,
             'l': 200,
-            'T': int(time.time() * 1000),
+            'T': now_ms,
             'm': True
         }
-    } for _ in range(100)]
+    }
     
-    test_depth = [{
-        'localtime': time.time(),
+    depth_template = {
+        'localtime': now,
         'stream': 'btcusdt@depth@0ms',
         'data': {
             'e': 'depthUpdate',
-            'E': int(time.time() * 1000),
-            'T': int(time.time() * 1000),
+            'E': now_ms,
+            'T': now_ms,
             's': 'BTCUSDT',
             'U': 123456,
             'u': 123457,
@@ -53,18 +73,18 @@ def test_optimized_functions():
             'b': [['50000.0', '1.0'], ['49999.0', '2.0']],
             'a': [['50001.0', '1.0'], ['50002.0', '2.0']]
         }
-    } for _ in range(100)]
+    }
     
-    test_kline = [{
-        'localtime': time.time(),
+    kline_template = {
+        'localtime': now,
         'stream': 'btcusdt@kline_1m',
         'data': {
             'e': 'kline',
-            'E': int(time.time() * 1000),
+            'E': now_ms,
             'k': {
                 's': 'BTCUSDT',
-                't': int(time.time() * 1000),
-                'T': int(time.time() * 1000) + 60000,
+                't': now_ms,
+                'T': now_ms + 60000,
                 'i': '1m',
                 'f': 100,
                 'L': 200,
@@ -81,36 +101,82 @@ def test_optimized_functions():
                 'B': '0'
             }
         }
-    } for _ in range(50)]
+    }
     
-    # 测试写入
-    start_time = time.time()
+    test_aggtrade = [aggtrade_template] * 100
+    test_depth = [depth_template] * 100
+    test_kline = [kline_template] * 50
     
-    try:
-        print("测试aggtrade写入...")
-        _flush_aggtrade_batch_optimized('TESTOPT', test_aggtrade)
-        print("✅ aggtrade写入成功")
-        
-        print("测试depth写入...")
-        _flush_depth_batch_optimized('TESTOPT', test_depth)
-        print("✅ depth写入成功")
+    # 每类数据: (文件前缀, 写入字段, 预期头部, 写入函数, 记录)
+    batches = [
+        ('aggtrade', AGGTRADE_FIELDS, AGGTRADE_EXPECTED_HEADER_BYTES, _flush_aggtrade_batch_optimized, test_aggtrade),
+        ('depth', DEPTH_FIELDS, DEPTH_EXPECTED_HEADER_BYTES, _flush_depth_batch_optimized, test_depth),
+        ('kline_1m', KLINE_FIELDS, KLINE_EXPECTED_HEADER_BYTES, _flush_kline_batch_optimized, test_kline),
+    ]
+    
+    # 输出写到TEST_ROOT（默认位于tmpfs），避免磁盘I/O干扰计时
+    with redirect_output_to_test_root():
+        targets = [_target_file(prefix, 'TESTOPT', fields) for prefix, fields, _, _, _ in batches]
+        # TEST_ROOT可能由环境变量指定并保留了之前的输出，只比较本次新增的记录数
+        counts_before = [count_records_in_file(filename) for filename, _ in targets]
         
-        print("测试kline写入...")
-        _flush_kline_batch_optimized('TESTOPT', test_kline)
-        print("✅ kline写入成功")
+        # 测试写入
+        start_time = time.perf_counter()
+        try:
+            # 三类数据写入不同文件，互不依赖，在线程中并行写入（fd缓存有锁保护，序列化状态按线程独立）
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [executor.submit(flush, 'TESTOPT', records)
+                           for _, _, _, flush, records in batches]
+                for future in futures:
+                    future.result()
+        except Exception as e:
+            logger.error("❌ 写入测试失败: %s", e)
+            return False
+        total_time = time.perf_counter() - start_time
         
-    except Exception as e:
-        print(f"❌ 写入测试失败: {e}")
-        return False
+        # 等待未完成的写入（io_uring）并关闭fd后再回读
+        file_writer.close_cached_writers()
+    
+    logger.info("✅ aggtrade/depth/kline写入完成: %d 条记录, 总写入时间 %.4fs",
+                len(test_aggtrade) + len(test_depth) + len(test_kline), total_time)
     
-    total_time = time.time() - start_time
-    print(f"\n总写入时间: {total_time:.4f}s")
-    print(f"写入记录数: {len(test_aggtrade) + len(test_depth) + len(test_kline)}")
+    if file_writer.ENABLE_ZSTD:
+        logger.info("⏭️  STREAMER_ZSTD=1 输出为压缩文件，跳过头部和记录数检查")
+        return True
     
-    return True
+    success = True
+    for (prefix, fields, header, _, records), (filename, file_fields), before in zip(
+            batches, targets, counts_before):
+        if file_fields is not fields:  # 按数据类型聚合写入时首列为symbol
+            header = b'symbol,' + header
+        header_ok, count = inspect_csv(filename, header)
+        if not header_ok:
+            logger.error("❌ %s 头部不正确: %s", prefix, filename)
+            success = False
+        elif count - before != len(records):
+            logger.error("❌ %s 记录数 %d，预期 %d: %s", prefix, count - before, len(records), filename)
+            success = False
+        else:
+            logger.info("✅ %s 头部正确，新增 %d 条记录", prefix, len(records))
+    
+    return success
 
 if __name__ == '__main__':
-    if test_optimized_functions():
-        print("\n🎉 优化版写入函数测试通过！")
-    else:
-        print("\n❌ 优化版写入函数测试失败！")
\ No newline at end of file
+    # 只给本模块的logger加handler，不改动root logger：run_all_tests在同一进程内依次执行测试脚本，
+    # 全局logging配置会影响之后的所有测试
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        success = test_optimized_functions()
+        if success:
+            logger.info("🎉 优化版写入函数测试通过！")
+        else:
+            logger.error("❌ 优化版写入函数测试失败！")
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    if not success:
+        sys.exit(1)
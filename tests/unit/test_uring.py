@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+测试io_uring批量写入引擎（需要Linux和liburing，不可用时跳过）
+"""
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.binance_streamer._uring import uring_available, UringBatchEngine
+
+def test_ordered_writes(engine: UringBatchEngine, directory: str) -> bool:
+    """多个文件交错提交，drain后每个文件内容按提交顺序完整写入"""
+    paths = [os.path.join(directory, f'file{i}.csv') for i in range(3)]
+    fds = [os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644) for path in paths]
+    expected = [bytearray() for _ in paths]
+    try:
+        for n in range(500):
+            for i, fd in enumerate(fds):
+                line = f'{i},{n}\r\n'.encode()
+                engine.submit(fd, line)
+                expected[i] += line
+        engine.drain()
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+    for path, data in zip(paths, expected):
+        with open(path, 'rb') as f:
+            if f.read() != data:
+                print(f"❌ {path} 内容与提交顺序不一致")
+                return False
+    print("✅ 交错提交的3个文件内容完整、顺序正确")
+    return True
+
+def test_error_reported(engine: UringBatchEngine, directory: str) -> bool:
+    """写入失败（只读fd）时drain抛出OSError，错误取走后引擎继续可用"""
+    path = os.path.join(directory, 'readonly.csv')
+    open(path, 'wb').close()
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        engine.submit(fd, b'lost\r\n')
+        try:
+            engine.drain()
+        except OSError as e:
+            print(f"✅ 写入失败已上报: {e}")
+        else:
+            print("❌ 写入只读fd失败但drain没有抛出异常")
+            return False
+    finally:
+        os.close(fd)
+
+    # 错误只上报一次
+    engine.drain()
+    return test_ordered_writes(engine, tempfile.mkdtemp(dir=directory))
+
+def main() -> bool:
+    print("=== 测试io_uring写入引擎 ===")
+    if not uring_available():
+        print("⏭️  当前平台或环境不支持io_uring（需要Linux和liburing），跳过")
+        return True
+
+    engine = UringBatchEngine()
+    try:
+        with tempfile.TemporaryDirectory(prefix='bs_uring_') as directory:
+            return test_ordered_writes(engine, directory) and test_error_reported(engine, directory)
+    finally:
+        engine.close()
+
+if __name__ == '__main__':
+    if main():
+        print("🎉 io_uring写入引擎测试通过！")
+    else:
+        print("❌ io_uring写入引擎测试失败！")
+        sys.exit(1)